@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+'''
+    Project clock frequency planner benchmark
+    @copyright: (C) 2026 Pat Deegan, https://psychogenic.com
+
+    Compares picking the RP system clock for a range of project
+    clock targets using the float scan DemoBoard used to do on 
+    every clock_project_PWM() against the integer ClockPlanner,
+    both cold and with its per-target cache warm.
+
+    Run from repo topdir, e.g.
+
+      PYTHONPATH=./src python ./bin/bench_clock_planner.py [NUM_TARGETS] [REPEATS]
+'''
+import sys
+import time
+
+from ttboard.util.clock_planner import ClockPlanner
+
+
+def ticks_us():
+    if hasattr(time, 'ticks_us'):
+        return time.ticks_us()
+    return int(time.perf_counter() * 1e6)
+
+
+def scan_float(freq:int, max_rp2040_freq:int=133_000_000):
+    # previous DemoBoard._get_best_rp2040_freq
+    if freq > max_rp2040_freq // 2:
+        raise ValueError("Requested frequency too high")
+    if freq <= 48_000_000 // (2**24 - 1):
+        raise ValueError("Requested frequency too low")
+
+    best_freq = 0
+    best_fracdiv = 2000000000
+    rp2040_freq = min(max_rp2040_freq, freq * (2**24 - 1))
+    if rp2040_freq > 136_000_000:
+        rp2040_freq = (rp2040_freq // 2_000_000) * 2_000_000
+    else:
+        rp2040_freq = (rp2040_freq // 1_000_000) * 1_000_000
+
+    while rp2040_freq >= 48_000_000 and rp2040_freq >= 1.9 * freq:
+        next_rp2040_freq = rp2040_freq - 1_000_000
+        if next_rp2040_freq > 136_000_000:
+            next_rp2040_freq = rp2040_freq - 2_000_000
+        pwm_divisor = max((rp2040_freq // (2 * freq)) * 2, 2)
+        if abs(int(rp2040_freq / pwm_divisor + 0.5) - freq) > abs(
+            int(rp2040_freq / (pwm_divisor + 2) + 0.5) - freq
+        ):
+            pwm_divisor += 2
+        fracdiv = abs(rp2040_freq / freq - pwm_divisor)
+        if freq == rp2040_freq // pwm_divisor:
+            return rp2040_freq
+        elif fracdiv < best_fracdiv:
+            best_fracdiv = fracdiv
+            best_freq = rp2040_freq
+        rp2040_freq = next_rp2040_freq
+    return best_freq
+
+
+def planner_cold(freq:int):
+    ClockPlanner.clear_cache()
+    return ClockPlanner.best_system_clock(freq)
+
+
+def planner_cached(freq:int):
+    return ClockPlanner.best_system_clock(freq)
+
+
+def measure(func, targets:list, repeats:int):
+    best_us = None
+    for _i in range(repeats):
+        start = ticks_us()
+        for freq in targets:
+            func(freq)
+        elapsed = ticks_us() - start
+        if best_us is None or elapsed < best_us:
+            best_us = elapsed
+    return best_us
+
+def main():
+    num_targets = 20
+    repeats = 5
+    if len(sys.argv) > 1:
+        num_targets = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        repeats = int(sys.argv[2])
+
+    # a spread of typical project clocks, 10kHz to 60MHz
+    step = (60_000_000 - 10_000) // num_targets
+    targets = list(range(10_000, 60_000_000, step))[:num_targets]
+    mismatches = list(filter(lambda f: scan_float(f) != ClockPlanner.best_system_clock(f), targets))
+    if len(mismatches):
+        print(f'Planner disagrees with float scan for {mismatches}!')
+
+    ClockPlanner.clear_cache()
+    ClockPlanner.CacheSize = max(ClockPlanner.CacheSize, num_targets)
+    runs = [
+        ('float scan', scan_float),
+        ('planner (cold)', planner_cold),
+        ('planner (cached)', planner_cached),
+        ]
+    print(f'Planning system clock for {len(targets)} targets, best of {repeats}')
+    for (desc, func) in runs:
+        best_us = measure(func, targets, repeats)
+        print(f'  {desc:18s} {best_us/1000:8.2f}ms  {best_us/len(targets):8.1f}us/target')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+'''
+    Shuttle index load benchmark
+    @copyright: (C) 2026 Pat Deegan, https://psychogenic.com
+
+    Builds a synthetic shuttle and compares loading its bin file
+    using the old per-field stream reads (a Design and a handful of
+    read() calls per record) against the bulk buffer/struct path
+    DesignIndex now uses.
+
+    Run from repo topdir, e.g.
+
+      PYTHONPATH=./src python ./bin/bench_shuttle_load.py [NUM_PROJECTS] [REPEATS]
+
+    Reports time, number of stream reads and memory allocated while
+    loading: peak traced bytes on CPython, total bytes allocated
+    (with gc disabled) on micropython.
+'''
+import gc
+import os
+import sys
+import time
+
+from ttboard.project_design import Design, DesignTable, DangerLevel
+from ttboard.project_mux import DesignIndex
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+class CountingReader:
+    '''
+        Wraps a file to count how many times it is read from
+    '''
+    def __init__(self, fh):
+        self._fh = fh
+        self.reads = 0
+
+    def read(self, n=-1):
+        self.reads += 1
+        return self._fh.read(n)
+
+    def readinto(self, buf):
+        self.reads += 1
+        return self._fh.readinto(buf)
+
+    def seek(self, *args):
+        return self._fh.seek(*args)
+
+    def tell(self):
+        return self._fh.tell()
+
+    def close(self):
+        self._fh.close()
+
+
+def ticks_us():
+    if hasattr(time, 'ticks_us'):
+        return time.ticks_us()
+    return int(time.perf_counter() * 1e6)
+
+
+def write_synthetic_shuttle(fpath:str, num_projects:int, version:int):
+    idx = DesignIndex(None, None)
+    table = idx._table
+    for i in range(num_projects):
+        danger = DangerLevel.SAFE if i % 5 else DangerLevel.UNKNOWN
+        table.append(i + 1, f'tt_um_synthetic_project_{i:04d}', danger, (i * 1000) % 66_000_000)
+    table.done()
+    idx.to_bin_file(fpath, version=version)
+
+
+def load_per_field(fpath:str):
+    # the previous DesignIndex.deserialize: one Design, and
+    # a read() per field, for every record in the file
+    idx = DesignIndex(None, None)
+    with open(fpath, 'rb') as fh:
+        reader = CountingReader(fh)
+        version = idx.bin_header_valid(reader)
+        if version != 1:
+            raise ValueError('per-field benchmark expects a v1 file')
+        table = DesignTable()
+        while True:
+            des = Design(None)
+            try:
+                des.deserialize(reader)
+            except:
+                break
+            table.append(des.count, des.name, des.danger_level, des.clock_hz)
+        table.done()
+    return (table, reader.reads)
+
+
+def load_bulk(fpath:str):
+    idx = DesignIndex(None, None)
+    with open(fpath, 'rb') as fh:
+        reader = CountingReader(fh)
+        version = idx.bin_header_valid(reader)
+        idx.deserialize(reader, version)
+    return (idx._table, reader.reads)
+
+
+def measure(load_func, fpath:str, repeats:int):
+    best_us = None
+    for _i in range(repeats):
+        gc.collect()
+        start = ticks_us()
+        load_func(fpath)
+        elapsed = ticks_us() - start
+        if best_us is None or elapsed < best_us:
+            best_us = elapsed
+
+    gc.collect()
+    if tracemalloc is not None:
+        tracemalloc.start()
+        (table, reads) = load_func(fpath)
+        allocated = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    else:
+        gc.disable()
+        before = gc.mem_alloc()
+        (table, reads) = load_func(fpath)
+        allocated = gc.mem_alloc() - before
+        gc.enable()
+
+    return (best_us, reads, allocated, len(table))
+
+def main():
+    num_projects = 1000
+    repeats = 5
+    if len(sys.argv) > 1:
+        num_projects = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        repeats = int(sys.argv[2])
+
+    v1_file = f'bench_shuttle_{num_projects}.v1.bin'
+    v2_file = f'bench_shuttle_{num_projects}.v2.bin'
+    write_synthetic_shuttle(v1_file, num_projects, 1)
+    write_synthetic_shuttle(v2_file, num_projects, 2)
+
+    alloc_desc = 'peak bytes' if tracemalloc is not None else 'bytes allocated'
+    runs = [
+        ('per-field reads (v1)', load_per_field, v1_file),
+        ('bulk struct (v1)', load_bulk, v1_file),
+        ('bulk struct (v2)', load_bulk, v2_file),
+        ]
+    print(f'Loading synthetic shuttle of {num_projects} projects, best of {repeats}')
+    try:
+        for (desc, func, fpath) in runs:
+            (best_us, reads, allocated, count) = measure(func, fpath, repeats)
+            if count != num_projects:
+                print(f'{desc}: loaded {count} projects, expected {num_projects}!')
+            print(f'  {desc:22s} {best_us/1000:8.2f}ms  {reads:6d} reads  {allocated:8d} {alloc_desc}')
+    finally:
+        os.remove(v1_file)
+        os.remove(v2_file)
+
+if __name__ == '__main__':
+    main()
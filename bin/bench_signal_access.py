@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+'''
+    cocotb DUT signal access benchmark
+    @copyright: (C) 2026 Pat Deegan, https://psychogenic.com
+
+    Counts signal reads/writes per second through the DUT wrappers,
+    against the generic paths they used to take (StandardPin call
+    forwarding, LogicObject value checks), and for a test_loopback
+    style loop: uio_in write, clock high, clock low, uo_out read,
+    with the read as a LogicArray (.value) or an int (int(port)).
+
+    Run from repo topdir, e.g.
+
+      PYTHONPATH=./src python ./bin/bench_signal_access.py [NUM_ACCESSES] [REPEATS]
+
+    or on the device, with the firmware installed
+
+      mpremote run bin/bench_signal_access.py
+'''
+import sys
+import time
+
+from ttboard.demoboard import DemoBoard, Pins
+from ttboard.cocotb.dut import DUT
+from ttboard.util.platform import IsRP2
+import ttboard.util.platform as plat
+from microcotb.types.logic_array import LogicArray
+
+
+def ticks_us():
+    if hasattr(time, 'ticks_us'):
+        return time.ticks_us()
+    return int(time.perf_counter() * 1e6)
+
+
+class GenericPinWrapper:
+    # previous PinWrapper
+    def __init__(self, pin):
+        self._pin = pin
+
+    @property
+    def value(self):
+        return self._pin.value()
+
+    @value.setter
+    def value(self, set_to:int):
+        if self._pin.mode != Pins.OUT:
+            self._pin.mode = Pins.OUT
+        self._pin.value(set_to)
+
+
+class GenericClockPin:
+    # previous ClockPin
+    @property
+    def value(self):
+        return plat.read_clock()
+
+    @value.setter
+    def value(self, set_to:int):
+        plat.write_clock(set_to)
+
+
+def generic_port_read(io):
+    # LogicObject.value
+    return LogicArray._from_handle(io.port.get_signal_val_binstr(),
+                                   on_change=lambda newval: io.set(newval))
+
+
+def measure(func, count:int, repeats:int):
+    best_us = None
+    for _i in range(repeats):
+        start = ticks_us()
+        func(count)
+        elapsed = ticks_us() - start
+        if best_us is None or elapsed < best_us:
+            best_us = elapsed
+    return max(best_us, 1)
+
+
+def main():
+    count = 2000
+    repeats = 5
+    if len(sys.argv) > 1:
+        count = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        repeats = int(sys.argv[2])
+
+    if IsRP2:
+        tt = DemoBoard(apply_user_config=False)
+    else:
+        tt = DemoBoard(apply_user_config=False, iniFile='src/config.ini')
+    dut = DUT()
+    dut.testing_will_begin()
+    dut.uio_oe_pico.value = 0xff
+
+    old_rst_n = GenericPinWrapper(tt.rst_n)
+    old_clk = GenericClockPin()
+
+    def new_clk_writes(n):
+        clk = dut.clk
+        for i in range(n):
+            clk.value = i & 1
+    def old_clk_writes(n):
+        for i in range(n):
+            old_clk.value = i & 1
+
+    def new_pin_writes(n):
+        rst_n = dut.rst_n
+        for _i in range(n):
+            rst_n.value = 1
+    def old_pin_writes(n):
+        for _i in range(n):
+            old_rst_n.value = 1
+
+    def new_port_writes(n):
+        uio_in = dut.uio_in
+        for i in range(n):
+            uio_in.value = i & 0xff
+    def old_port_writes(n):
+        uio_in = dut.uio_in
+        for i in range(n):
+            uio_in.set(i & 0xff)
+
+    def new_port_reads(n):
+        uo_out = dut.uo_out
+        for _i in range(n):
+            uo_out.value
+    def old_port_reads(n):
+        uo_out = dut.uo_out
+        for _i in range(n):
+            generic_port_read(uo_out)
+
+    def new_port_ints(n):
+        uo_out = dut.uo_out
+        for _i in range(n):
+            int(uo_out)
+    def old_port_ints(n):
+        uo_out = dut.uo_out
+        for _i in range(n):
+            int(generic_port_read(uo_out))
+
+    def new_loopback(n):
+        for i in range(n // 4):
+            dut.uio_in.value = i & 0xff
+            dut.clk.value = 1
+            dut.clk.value = 0
+            dut.uo_out.value == i
+    def old_loopback(n):
+        for i in range(n // 4):
+            dut.uio_in.set(i & 0xff)
+            old_clk.value = 1
+            old_clk.value = 0
+            generic_port_read(dut.uo_out) == i
+
+    def new_int_loopback(n):
+        for i in range(n // 4):
+            dut.uio_in.value = i & 0xff
+            dut.clk.value = 1
+            dut.clk.value = 0
+            int(dut.uo_out) == i
+    def old_int_loopback(n):
+        for i in range(n // 4):
+            dut.uio_in.set(i & 0xff)
+            old_clk.value = 1
+            old_clk.value = 0
+            int(generic_port_read(dut.uo_out)) == i
+
+    runs = [
+        ('clock writes', old_clk_writes, new_clk_writes),
+        ('rst_n writes', old_pin_writes, new_pin_writes),
+        ('uio_in writes', old_port_writes, new_port_writes),
+        ('uo_out reads', old_port_reads, new_port_reads),
+        ('uo_out int()', old_port_ints, new_port_ints),
+        ('loopback loop', old_loopback, new_loopback),
+        ('int() loopback', old_int_loopback, new_int_loopback),
+    ]
+
+    stdout = sys.stdout
+    results = []
+    try:
+        if not IsRP2:
+            # the desktop platform reports every access, mute it
+            import io
+            sys.stdout = io.StringIO()
+        for (desc, old_func, new_func) in runs:
+            results.append((desc, measure(old_func, count, repeats),
+                            measure(new_func, count, repeats)))
+    finally:
+        sys.stdout = stdout
+        dut.testing_done()
+
+    print(f'{count} signal accesses, best of {repeats}')
+    print(f'  {"":16s} {"generic":>12s} {"DUT":>12s}')
+    for (desc, old_us, new_us) in results:
+        print(f'  {desc:16s} {count*1_000_000//old_us:10d}/s {count*1_000_000//new_us:10d}/s  x{old_us/new_us:.1f}')
+
+if __name__ == '__main__':
+    main()
@@ -1,33 +1,89 @@
-import sys
+#!/usr/bin/env python
+'''
+    Shuttle JSON to bin compiler
+    @copyright: (C) 2024 Pat Deegan, https://psychogenic.com
+
+    Converts shuttle index JSON files to the serialized bin
+    format the SDK prefers loading, in a single streaming pass
+    over the JSON (see DesignIndex.compile_json).
+
+    usage: serialize_shuttle.py [-h] [--version VERSION] [--jobs JOBS] src [src ...]
+
+    Each src may be a SHUTTLE.JSON, which gets written out
+    alongside as SHUTTLE.JSON.bin, or a directory, in which case
+    every *.json within is converted.  Multiple files are handled
+    in parallel, by a pool of --jobs processes.
+
+    Sample use cases
+
+    1) a single shuttle
+    ./serialize_shuttle.py path/to/tt06.json
+
+    2) all the shuttles, for a release, in the older v1 format
+    ./serialize_shuttle.py --version 1 path/to/shuttles
+'''
+import argparse
 import os
+from concurrent.futures import ProcessPoolExecutor
 from ttboard.project_mux import DesignIndex
 BinFileSuffix = 'bin'
 
+def get_args():
+    parser = argparse.ArgumentParser(description='Shuttle JSON to bin compiler')
+    parser.add_argument('--version', type=int, default=DesignIndex.SerializerVersion,
+                        help=f'Serializer version (default {DesignIndex.SerializerVersion})')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(),
+                        help='Number of files to convert in parallel')
+    parser.add_argument('src', nargs='+', help='SHUTTLE.JSON file(s) or directories of them')
+    return parser.parse_args()
+
+def json_sources(srcs:list):
+    found = []
+    for src in srcs:
+        if os.path.isdir(src):
+            for fname in sorted(os.listdir(src)):
+                if fname.endswith('.json'):
+                    found.append(os.path.join(src, fname))
+        else:
+            found.append(src)
+    return found
+
+def compile_shuttle(fname:str, version:int):
+    if not os.path.exists(fname):
+        return (False, f'Cannot find {fname}?')
+
+    dest_file = f'{fname}.{BinFileSuffix}'
+    try:
+        DesignIndex.compile_json_to_bin_file(fname, dest_file, version)
+    except Exception as e:
+        return (False, f'Failed to convert {fname}: {e}')
+
+    if os.path.exists(dest_file):
+        return (True, f'Wrote out {dest_file}')
+
+    return (False, f'Cannot find resulting file {dest_file}?')
+
 def main():
-    if len(sys.argv) < 2:
+    args = get_args()
+    fnames = json_sources(args.src)
+    if not len(fnames):
         print("MUST pass SHUTTLE.JSON argument")
         return False
-    fname = sys.argv[1]
-    if not os.path.exists(fname):
-        print(f'Cannot find {fname}?')
-        return False
-    
-    basename = os.path.basename(fname)
-    destdir = os.path.dirname(fname)
-    dest_file = os.path.join(destdir, f'{basename}.{BinFileSuffix}')
-    
-    d = DesignIndex(None, fname)
-    d.to_bin_file(dest_file)
-    
-    if os.path.exists(dest_file):
-        print(f'Wrote out {dest_file}')
-        return True
-        
-    print(f'Cannot find resulting file {dest_file}?')
-    return False
+
+    versions = [args.version]*len(fnames)
+    if len(fnames) == 1 or args.jobs < 2:
+        results = list(map(compile_shuttle, fnames, versions))
+    else:
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(fnames))) as pool:
+            results = list(pool.map(compile_shuttle, fnames, versions))
+
+    all_ok = True
+    for (ok, msg) in results:
+        print(msg)
+        all_ok = all_ok and ok
+
+    return all_ok
 
 if __name__ == '__main__':
     if not main():
         print("Prawblemz")
-#from ttboard.project_mux import *
-#d = DesignIndex(None, 'ho.json')
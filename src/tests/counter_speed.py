@@ -10,23 +10,12 @@ import time
 from ttboard.mode import RPMode
 from ttboard.demoboard import DemoBoard
 
-# PIO program to drive the clock.  Put a value n and it clocks n+1 times
-# Reads 0 when done.
-@rp2.asm_pio(sideset_init=rp2.PIO.OUT_LOW, autopull=True, pull_thresh=32, autopush=True, push_thresh=32)
-def clock_prog():
-    out(x, 32)              .side(0)
-    label("clock_loop")
-    nop()                   .side(1)
-    jmp(x_dec, "clock_loop").side(0)
-    in_(null, 32)           .side(0)
-
 # Select design, don't apply config so the PWM doesn't start.
 tt = DemoBoard(apply_user_config=False)
 tt.shuttle.tt_um_test.enable()
 
-# Setup the PIO clock driver
-sm = rp2.StateMachine(0, clock_prog, sideset_base=machine.Pin(0))
-sm.active(1)
+# the project clock is driven from PIO, by tt.clock_cycles(), 
+# at half the system clock
 
 def run_test(freq, fast=False):
     # Multiply requested project clock frequency by 2 to get RP2040 clock
@@ -43,8 +32,7 @@ def run_test(freq, fast=False):
     try:
         # Run 1 clock
         print("Clock test... ", end ="")
-        sm.put(1)
-        sm.get()
+        tt.clock_cycles(2)
         print(f" done. Value: {tt.uo_out.value}")
 
         errors = 0
@@ -54,8 +42,7 @@ def run_test(freq, fast=False):
             # Run clock for approx 0.25 or 1 second, sending a multiple of 256 clocks plus 1.
             clocks = (freq // 2048) * 256 if fast else (freq // 512) * 256
             t = time.ticks_us()
-            sm.put(clocks)
-            sm.get()
+            tt.clock_cycles(clocks + 1)
             t = time.ticks_us() - t
             print(f"Clocked for {t}us: ", end = "")
                 
@@ -10,48 +10,304 @@ import microcotb.dut
 from microcotb.testcase import TestCase
 from microcotb.dut import NoopSignal
 from microcotb.dut import Wire
+from microcotb.clock import Clock
+from microcotb.time.system import SystemTime
+from microcotb.time.value import TimeValue, TimeConverter
+from microcotb.triggers.clockcycles import ClockCycles
 import ttboard.log as logging
 
 
 class PinWrapper(microcotb.dut.PinWrapper):
+    '''
+        Wraps a StandardPin, but talks to the underlying 
+        machine.Pin directly, rather than through StandardPin's 
+        __call__ and __getattr__ forwarding.
+    '''
     def __init__(self, name:str, pin):
         super().__init__(name, pin)
+        self._pin_value = pin.raw_pin.value
         
     @property 
     def value(self):
-        return self._pin.value()
+        return self._pin_value()
     
     @value.setter 
     def value(self, set_to:int):
+        # StandardPin keeps track of the direction, no hardware access
         if self._pin.mode != Pins.OUT:
             self._pin.mode = Pins.OUT
-        self._pin.value(set_to)
+        self._pin_value(set_to)
         
+# what ClockPin writes the clock with: the platform function itself, 
+# or one calling the before_edge hook first.  Module level, rather than
+# on the instance, so a write is as direct as a call to the platform.
+_write_clock = plat.write_clock
+_read_clock = plat.read_clock
+
 class ClockPin(microcotb.dut.PinWrapper):
     '''
         clock pin is use *a lot*, needs
         to be optimized a little by 
         calling the low level platform func
+        There's only the one project clock, the latest 
+        ClockPin created is the one with a say in before_edge.
     '''
-    
     def __init__(self, name:str, pin):
         super().__init__(name, pin)
+        self.before_edge = None
+        
+    @property 
+    def before_edge(self):
+        return self._before_edge
+    
+    @before_edge.setter 
+    def before_edge(self, func):
+        '''
+            func() gets called ahead of every write, when set
+        '''
+        global _write_clock
+        self._before_edge = func
+        if func is None:
+            _write_clock = plat.write_clock
+        else:
+            _write_clock = self._write_after
+        
+    def _write_after(self, set_to:int):
+        self._before_edge()
+        plat.write_clock(set_to)
         
     @property 
     def value(self):
-        return plat.read_clock()
+        return _read_clock()
     
     @value.setter 
     def value(self, set_to:int):
-        plat.write_clock(set_to)
+        _write_clock(set_to)
     
-            
+class DeferredSignal:
+    '''
+        Stands in for a DUT port or pin while the DUT defers writes: 
+        writes to deferrable signals get queued with the DUT, 
+        anything else (reads, writes to other signals) has the 
+        queued writes applied first, then goes to the real thing.
+    '''
+    def __init__(self, dut, name:str, signal, deferrable:bool):
+        self._dut = dut
+        self._name = name
+        self._signal = signal
+        self._deferrable = deferrable
+        
+    @property 
+    def value(self):
+        self._dut.flush_writes()
+        return self._signal.value
+    
+    @value.setter 
+    def value(self, set_to):
+        if self._deferrable:
+            self._dut.queue_write(self._name, set_to)
+            return
+        self._dut.flush_writes()
+        self._signal.value = set_to
+        
+    def __getitem__(self, key):
+        self._dut.flush_writes()
+        return self._signal[key]
+    
+    def __setitem__(self, key, value):
+        if self._deferrable and type(key) == int and type(value) in (int, bool):
+            current = self._dut.pending_write(self._name)
+            if current is None:
+                current = self._signal.last_value
+            bit = 1 << key
+            if value:
+                self._dut.queue_write(self._name, int(current) | bit)
+            else:
+                self._dut.queue_write(self._name, int(current) & ~bit)
+            return
+        self._dut.flush_writes()
+        self._signal[key] = value
+        
+    def __int__(self):
+        self._dut.flush_writes()
+        return int(self._signal)
+    
+    def __getattr__(self, name):
+        return getattr(self._signal, name)
+    
+    def __repr__(self):
+        return f'<Deferred {repr(self._signal)}>'
+    
+
+class ClockCyclesOffload:
+    '''
+        Services 
+            await ClockCycles(dut.clk, n)
+        in one go, when the clock started on dut.clk is the only one 
+        around: the toggles the simulated clock would have made are
+        driven straight out (full cycles as a single PIO burst) and 
+        simulated time is moved to exactly where the step-by-step 
+        advance would have left it.
+        Anything else (other clocks, a timeout that would trip midway, 
+        units that don't sit on whole base units) goes the usual route.
+        
+        There's no hook for this in microcotb, so ClockCycles.next gets
+        swapped out, only while a test body runs (see scoped()) and 
+        only if the microcotb internals used here are all present.
+    '''
+    _original_next = None
+    _dut = None
+    
+    @classmethod 
+    def supported(cls) -> bool:
+        '''
+            Check microcotb still has everything run() relies on
+        '''
+        probe = Clock(None, 2, TimeValue.BaseUnits) # never started
+        for obj, attr in [(ClockCycles, 'next'), (SystemTime, '_timeout_setting'), 
+                          (SystemTime, 'ForceSleepOnAdvance'), (TimeConverter, 'rescale'),
+                          (probe, 'half_period'), (probe, 'next_toggle'), 
+                          (probe, 'current_signal_value'), (probe.half_period, '_t_baseunits')]:
+            if not hasattr(obj, attr):
+                return False
+        return True
+    
+    @classmethod 
+    def install(cls, dut) -> bool:
+        if cls._original_next is None:
+            if not cls.supported():
+                dut._log.warn('microcotb internals have changed, not offloading ClockCycles')
+                return False
+            cls._original_next = ClockCycles.next
+            ClockCycles.next = _clock_cycles_next
+        cls._dut = dut
+        return True
+        
+    @classmethod 
+    def uninstall(cls):
+        if cls._original_next is not None:
+            ClockCycles.next = cls._original_next
+            cls._original_next = None
+        cls._dut = None
+        
+    @classmethod 
+    def installed(cls) -> bool:
+        return cls._original_next is not None
+    
+    @classmethod 
+    def scoped(cls, func):
+        '''
+            func, a test coroutine function, wrapped to have the 
+            offload in place while it runs, and gone however it ends
+        '''
+        if isinstance(func, _OffloadScope):
+            return func
+        return _OffloadScope(func)
+    
+    @classmethod 
+    def run(cls, trigger:ClockCycles) -> bool:
+        '''
+            @return: True if the trigger was handled here
+        '''
+        dut = cls._dut
+        signal = trigger.signal
+        if dut is None or not dut.offload_clock_cycles or signal is not dut.clk:
+            return False
+        
+        clocks = Clock.all()
+        if len(clocks) != 1 or clocks[0].signal is not signal \
+            or SystemTime.ForceSleepOnAdvance:
+            return False
+        
+        clk = clocks[0]
+        half_period = clk.half_period
+        now = SystemTime.current()
+        base_units = TimeValue.BaseUnits
+        if half_period.units != base_units or now.units != base_units \
+            or clk.next_toggle.units != base_units:
+            return False
+        
+        # whole base units throughout, or the step-by-step float sums
+        # might not land where these would
+        hp = half_period.time
+        t_now = now._t_baseunits
+        t_toggle = clk.next_toggle._t_baseunits
+        if hp <= 0 or hp != int(hp) or t_now != int(t_now) or t_toggle != int(t_toggle):
+            return False
+        hp = int(hp)
+        t_now = int(t_now)
+        t_toggle = int(t_toggle)
+        
+        # same count as ClockCycles.next()
+        num_transitions = trigger.num_cycles * 2
+        if (trigger.rising and signal.value == 0 or
+            not trigger.rising and signal.value == 1):
+            num_transitions -= 1
+        trigger.num_transitions = num_transitions
+        
+        # ClockCycles.next() advances by a half period (the shortest 
+        # interval, with a single clock) until it's past the target...
+        t_target = t_now + hp * num_transitions
+        steps = 0
+        if t_target >= t_now:
+            steps = (t_target - t_now) // hp + 1
+        t_end = t_now + steps * hp
+        
+        timeout = SystemTime._timeout_setting
+        if timeout is not None and t_end >= timeout._t_baseunits:
+            # let the regular path raise at the right moment
+            return False
+        
+        # ... and the clock toggles for every event strictly before that
+        toggles = 0
+        if t_toggle < t_end:
+            toggles = (t_end - t_toggle - 1) // hp + 1
+        
+        freq = round(1 / TimeConverter.rescale(2 * hp, base_units, 'sec'))
+        clk.current_signal_value = dut.drive_clock_toggles(
+                                        clk.current_signal_value, toggles, freq)
+        # clock state now matches the time, so advancing toggles nothing
+        clk.next_toggle += half_period * toggles
+        SystemTime.advance(half_period * steps)
+        return True
+    
+def _clock_cycles_next(trigger):
+    if not ClockCyclesOffload.run(trigger):
+        return ClockCyclesOffload._original_next(trigger)
+    raise StopIteration
+
+class _OffloadScope:
+    '''
+        Stands in for a TestCase function, see ClockCyclesOffload.scoped()
+    '''
+    def __init__(self, func):
+        self.function = func
+        
+    def __call__(self, dut):
+        return self._run(dut)
+    
+    async def _run(self, dut):
+        ClockCyclesOffload.install(dut)
+        try:
+            return await self.function(dut)
+        finally:
+            ClockCyclesOffload.uninstall()
 
 class DUT(microcotb.dut.DUT):
     TTIOPortNames = ['uo_out', 'ui_in', 'uio_in', 
                      'uio_out', 'uio_oe_pico']
     
+    # await ClockCycles(dut.clk, n) serviced in bulk, where safe
+    offload_clock_cycles = True
+    # fewer full cycles than this are just toggled in place
+    ClockBurstMinCycles = 8
+    # opt-in cocotb-style scheduling, see set_deferred_writes()
+    DeferSignalWrites = False
+    DeferrableSignals = ['ui_in', 'uio_in', 'rst_n']
+    
     def __init__(self, name:str='DUT'):
+        # before anything else, __setattr__ relies on it
+        object.__setattr__(self, '_ttio_port_names', set(self.TTIOPortNames))
         super().__init__(name)
         tt:DemoBoard = DemoBoard.get()
         self.tt = tt # give ourselves access to demoboard object
@@ -71,6 +327,74 @@ class DUT(microcotb.dut.DUT):
         # ena may be used in existing tests, does nothing
         self.ena = NoopSignal('ena', 1)
         
+        self._pending_writes = dict()
+        self._direct_signals = None
+        if self.DeferSignalWrites:
+            self.set_deferred_writes(True)
+        
+    @property 
+    def deferring_writes(self) -> bool:
+        return self._direct_signals is not None
+    
+    def set_deferred_writes(self, enable:bool):
+        '''
+            cocotb-style scheduling: with this on, writes to ui_in, 
+            uio_in and rst_n are held back and applied together just 
+            before the next clock edge (ui_in and uio_in in a single 
+            register write per GPIO bank), so the ports change at the 
+            same instant and each only once per cycle.
+            
+            Held writes are also applied before any of the ports
+            are read, uio_oe_pico changes, or the DemoBoard clocks 
+            the project itself (clock_project_once(), clock_cycles(), 
+            PWM...), so nothing ever sees stale inputs.
+        '''
+        if enable == self.deferring_writes:
+            return
+        
+        if enable:
+            # swapped in place: going through __setattr__ would 
+            # write these to the ports
+            direct = dict()
+            for name in self.TTIOPortNames + ['rst_n']:
+                direct[name] = getattr(self, name)
+                object.__setattr__(self, name, DeferredSignal(self, name, direct[name], 
+                                                              name in self.DeferrableSignals))
+            self._direct_signals = direct
+            self.clk.before_edge = self.flush_writes
+            self.tt.before_clocking = self.flush_writes
+            return
+            
+        self.flush_writes()
+        self.clk.before_edge = None
+        self.tt.before_clocking = None
+        for name, signal in self._direct_signals.items():
+            object.__setattr__(self, name, signal)
+        self._direct_signals = None
+        
+    def queue_write(self, name:str, value):
+        self._pending_writes[name] = value
+        
+    def pending_write(self, name:str):
+        return self._pending_writes.get(name, None)
+        
+    def flush_writes(self):
+        '''
+            Apply any held writes, see set_deferred_writes()
+        '''
+        pending = self._pending_writes
+        if not len(pending):
+            return
+        self._pending_writes = dict()
+        
+        if 'rst_n' in pending:
+            self._direct_signals['rst_n'].value = pending['rst_n']
+        
+        ui_in = pending.get('ui_in', None)
+        uio_in = pending.get('uio_in', None)
+        if ui_in is not None or uio_in is not None:
+            self.tt.pins.write_ports(ui_in, uio_in)
+        
     
     def testing_will_begin(self):
         self._log.debug('About to start a test run')
@@ -82,14 +406,51 @@ class DUT(microcotb.dut.DUT):
         # and this: make sure is an output
         self.tt.pins.rp_projclk.mode = Pins.OUT
         
+    def drive_clock_toggles(self, start_value:int, count:int, freq:int) -> int:
+        '''
+            Toggle the project clock count times, from start_value, 
+            with the full cycles sent as a single burst at freq Hz
+            when there are enough of them.
+            @return: the final clock value
+        '''
+        self.flush_writes()
+        value = start_value
+        if count and value:
+            plat.write_clock(0)
+            value = 0
+            count -= 1
+        
+        full_cycles = count // 2
+        if full_cycles:
+            burst = None
+            if full_cycles >= self.ClockBurstMinCycles and freq > 0:
+                burst = self.tt.clock_burst
+                try:
+                    burst.start(full_cycles, min(freq, burst.max_freq()))
+                    burst.wait()
+                except ValueError:
+                    # freq out of the burst range
+                    burst = None
+            if burst is None:
+                for _i in range(full_cycles):
+                    plat.write_clock(1)
+                    plat.write_clock(0)
+        
+        if count & 1:
+            plat.write_clock(1)
+            value = 1
+        return value
+        
     def testing_unit_start(self, test:TestCase):
-        # override if desired
+        # override if desired, but call this to keep
+        # ClockCycles offloaded
         self._log.debug(f'Test {test.name} about to start')
+        test.function = ClockCyclesOffload.scoped(test.function)
 
 
     def testing_unit_done(self, test:TestCase):
         # override if desired
-        
+        self.flush_writes()
         if test.failed:
             self._log.debug(f'{test.name} failed because: {test.failed_msg}')
         else:
@@ -100,13 +461,15 @@ class DUT(microcotb.dut.DUT):
         # override if desired, but good idea to reset clock pin mode
         # or just call super().testing_unit_done(test) to get it done
         # make sure is an input
+        self.flush_writes()
+        ClockCyclesOffload.uninstall()
         self.tt.pins.rp_projclk.mode = Pins.IN
         
         self._log.debug('All testing done')
         
         
     def __setattr__(self, name:str, value):
-        if hasattr(self, name) and name in self.TTIOPortNames:
+        if name in self._ttio_port_names and hasattr(self, name):
             port = getattr(self, name)
             port.value = value 
             return
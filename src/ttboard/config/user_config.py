@@ -133,6 +133,23 @@ class UserConfig:
             force_demoboard = tt06
             
             
+            # design_cache_size / design_cache_bytes
+            # upper bound on loaded project Design objects kept 
+            # around, as a count and/or approximate bytes, 0 for no limit
+            design_cache_size = 32
+            
+            
+            # strict_memory_saving (bool)
+            # keep as little as possible about the shuttle in RAM
+            strict_memory_saving = no
+            
+            
+            # mux_edge_us
+            # duration, in microseconds, of each edge sent to step the 
+            # project mux when selecting a design
+            mux_edge_us = 10
+            
+            
         Each project section is named [SHUTTLE_PROJECT_NAME]
         and will be an instance of, and described by, UserProjectConfig
     '''
@@ -149,7 +166,9 @@ class UserConfig:
             
             
         def_opts = ['mode', 'project', 'start_in_reset', 'log_level',
-                    'rp_clock_frequency', 'force_shuttle', 'force_demoboard']
+                    'rp_clock_frequency', 'force_shuttle', 'force_demoboard',
+                    'design_cache_size', 'design_cache_bytes', 'strict_memory_saving',
+                    'mux_edge_us']
         for opt in def_opts:
             val = None
             if conf.has_option('DEFAULT', opt):
@@ -199,6 +218,22 @@ class UserConfig:
     def force_demoboard(self):
         return self._get_default_option('force_demoboard')
     
+    @property 
+    def design_cache_size(self):
+        return int(self._get_default_option('design_cache_size', 0))
+    
+    @property 
+    def design_cache_bytes(self):
+        return int(self._get_default_option('design_cache_bytes', 0))
+    
+    @property 
+    def strict_memory_saving(self):
+        return self._get_default_option('strict_memory_saving')
+    
+    @property 
+    def mux_edge_us(self):
+        return self._get_default_option('mux_edge_us')
+    
     
     @classmethod 
     def string_to_loglevel(cls, loglevname:str):
@@ -239,6 +274,21 @@ class UserConfig:
             gc.collect()
         return self._proj_configs[name]
     
+    def preload(self, names:list):
+        '''
+            Loads the config for all these projects with a single 
+            parse of the ini file, rather than one each.
+        '''
+        to_load = list(filter(lambda n: self.has_project(n) and self._proj_configs[n] is None, names))
+        if not len(to_load):
+            return 
+        conf = ConfigParser()
+        conf.read(self.inifile_path)
+        for name in to_load:
+            self._proj_configs[name] = UserProjectConfig(name, conf)
+        conf = None 
+        gc.collect()
+    
     def __getattr__(self, name):
         if self.has_project(name):
             return self.project(name)
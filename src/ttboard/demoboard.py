@@ -18,6 +18,7 @@ from ttboard.mode import RPMode
 from ttboard.pins.pins import Pins
 from ttboard.project_mux import Design
 from ttboard.config.user_config import UserConfig
+from ttboard.util.clock_planner import ClockPlanner
 import ttboard.util.platform as platform 
 from ttboard.boot.demoboard_detect import DemoboardDetect, DemoboardVersion, DemoboardCarrier
 
@@ -145,6 +146,12 @@ class DemoBoard:
         self.pins.dieOnInputControlSwitchHigh = False
         self.pins.mode = pins_mode # force re-init of pins to apply new setting
         self.shuttle = Globals.project_mux(self.user_config.force_shuttle)
+        if hasattr(self.shuttle, 'configure_design_cache'):
+            self.shuttle.configure_design_cache(self.user_config.design_cache_size, 
+                                                self.user_config.design_cache_bytes, 
+                                                self.user_config.strict_memory_saving)
+        if self.user_config.mux_edge_us is not None:
+            self.shuttle.mux_edge_us = self.user_config.mux_edge_us
         self.pins.dieOnInputControlSwitchHigh = True
         self.pins.mode = pins_mode # force re-init of pins to apply new setting
         
@@ -153,8 +160,13 @@ class DemoBoard:
         
         # internal
         self.shuttle.design_enabled_callback = self.apply_user_config
+        self.shuttle.sweep_start_callback = self._prepare_sweep
         self._clock_pwm = None
         self._clock_pio = None 
+        self._clock_burst = None
+        # called before the project gets clocked from here, 
+        # e.g. by the cocotb DUT to apply deferred writes
+        self.before_clocking = None
         
         self._project_previously_loaded = {}
         self.load_default_project() 
@@ -313,12 +325,195 @@ class DemoBoard:
         if self.is_auto_clocking:
             self.clock_project_stop()
             
+        self._prepare_clocking()
         self.pins.project_clk_driven_by_RP2(True)
         self.clk.toggle()
         if msDelay > 0:
             time.sleep_ms(msDelay)
         self.clk.toggle()
         
+    def clock_cycles(self, n:int, freq:int=None, blocking:bool=True):
+        '''
+            Clock the project exactly n times, from a PIO 
+            state machine, e.g.
+            
+                tt.clock_cycles(1_000_000, 10_000_000)
+            
+            @param freq: clock frequency in Hz, default is as fast 
+                         as possible (half the system clock)
+            @param blocking: wait until all the cycles are out, 
+                             otherwise return immediately
+            @return: the clock burst, whose done property tells whether 
+                     it's complete, and wait() blocks until it is
+        '''
+        if self.is_auto_clocking:
+            self.clock_project_stop()
+        self._prepare_clocking()
+        self.pins.project_clk_driven_by_RP2(True)
+        self.clk(0)
+        burst = self.clock_burst
+        burst.start(n, freq)
+        if blocking:
+            burst.wait()
+        return burst
+    
+    @property 
+    def clock_burst(self):
+        '''
+            The PIO clock burst behind clock_cycles(), for anything 
+            that has already set up the clock pin and wants it directly.
+        '''
+        if self._clock_burst is None:
+            self._clock_burst = platform.ClockBurst(self.pins.rp_projclk.raw_pin)
+        return self._clock_burst
+    
+    def _prepare_clocking(self):
+        # let any non-blocking clock_cycles() complete, and 
+        # have whoever is holding back input writes apply them
+        if self._clock_burst is not None:
+            self._clock_burst.wait()
+        if self.before_clocking is not None:
+            self.before_clocking()
+        
+    def write_ports(self, ui_in:int=None, uio_in:int=None):
+        '''
+            Set ui_in and uio_in simultaneously, e.g. 
+            an address and data for the project to latch
+            on the next clock
+            
+                tt.write_ports(ui_in=0x12, uio_in=0xa5)
+                tt.clock_project_once()
+            
+            Either may be left out, to leave that port as is.
+        '''
+        self.pins.write_ports(ui_in, uio_in)
+        
+    def play_stimulus(self, ui_in, uio_in=None) -> int:
+        '''
+            Drive ui_in, and optionally uio_in, from buffers
+            (bytearray, array('B') etc) with one project clock 
+            per entry: the inputs are set, then the clock goes 
+            high and back low.
+            
+            The ports are left at the last values played, and 
+            only uio pins set as outputs (uio_oe_pico) are affected.
+            
+            @return: number of clock cycles played
+        '''
+        if uio_in is not None and len(uio_in) != len(ui_in):
+            raise ValueError('ui_in and uio_in stimulus lengths differ')
+        
+        self._prepare_clocking()
+        if self.is_auto_clocking:
+            self.clock_project_stop()
+        self.pins.project_clk_driven_by_RP2(True)
+        self.clk(0)
+        num_played = platform.play_stimulus(ui_in, uio_in)
+        # played straight to the registers: bring the ports up to date
+        if len(ui_in):
+            self.ui_in.port.do_force_update_last_value(ui_in[-1] & 0xff)
+            if uio_in is not None:
+                self.uio_in.port.do_force_update_last_value(uio_in[-1] & 0xff)
+        return num_played
+        
+    def capture(self, n_cycles:int, ports=('uo_out', 'uio_out'), buf=None, 
+                edge:str='falling', clock_hz:int=1_000_000):
+        '''
+            Clocks the project n_cycles times, sampling the output 
+            ports on every cycle, into buf.
+            
+            @param ports: any of 'uo_out' and 'uio_out'
+            @param buf: bytearray/array('B') of at least n_cycles*len(ports),
+                        allocated if not passed.  Holds a byte per port, 
+                        in the order given, for each cycle.
+            @param edge: sample just before the 'rising' or 'falling' 
+                         edge of each clock
+            @param clock_hz: project clock rate, where PIO/DMA is used 
+                             (RP2350), otherwise as fast as the CPU goes
+            @raise ValueError: if clock_hz is out of the PIO's range
+                               (see platform.capture_clock_range())
+            @return: buf
+            
+            e.g.
+                samples = tt.capture(1000, ['uo_out'])
+        '''
+        ports = tuple(ports)
+        if not len(ports) or len(ports) > 2 or len(set(ports)) != len(ports):
+            raise ValueError(f'Bad capture ports {ports}')
+        for p in ports:
+            if p not in ['uo_out', 'uio_out']:
+                raise ValueError(f'Can only capture uo_out and uio_out, not {p}')
+        if edge not in ['rising', 'falling']:
+            raise ValueError(f'edge must be rising or falling, not {edge}')
+        clock_range = platform.capture_clock_range()
+        if clock_range is not None and not (clock_range[0] <= clock_hz <= clock_range[1]):
+            raise ValueError(f'Capture clock_hz must be within {clock_range[0]}-{clock_range[1]}Hz')
+        
+        num_bytes = n_cycles*len(ports)
+        if buf is None:
+            buf = bytearray(num_bytes)
+        elif len(buf) < num_bytes:
+            raise ValueError(f'Capture buffer needs {num_bytes} bytes')
+        if n_cycles <= 0:
+            return buf
+        
+        self._prepare_clocking()
+        if self.is_auto_clocking:
+            self.clock_project_stop()
+        self.pins.project_clk_driven_by_RP2(True)
+        self.clk(0)
+        if not platform.capture_outputs(buf, n_cycles, ports, edge == 'rising', clock_hz):
+            if clock_range is not None:
+                log.warn(f'No PIO capture available, captured as fast as possible rather than at {clock_hz}Hz')
+            else:
+                log.debug('Captured with register loop')
+        return buf
+        
+    def check_outputs(self, expected, mask=None, port:str='uo_out', edge:str='falling', 
+                      clock_hz:int=1_000_000, chunk_cycles:int=1024):
+        '''
+            Clocks the project once per entry in expected, checking 
+            the port against it on every cycle, e.g. for a counter
+            
+                (first, count) = tt.check_outputs(bytes(range(256)))
+                
+            Samples are taken as with capture(), a chunk at a time, 
+            and compared in a native loop, so long sequences run 
+            at close to capture speed, with python only involved 
+            once it's all done.
+            
+            @param expected: bytearray/array('B') of expected values
+            @param mask: optional buffer of the same length, with the 
+                         bits to compare on each cycle set
+            @param port: 'uo_out' or 'uio_out'
+            @param edge: sample before the 'rising' or 'falling' edge
+            @param chunk_cycles: cycles per capture, sets the size of 
+                                 the sample buffer
+            @return: tuple (index of first mismatch, or None, number of mismatches)
+        '''
+        num_cycles = len(expected)
+        if mask is not None and len(mask) != num_cycles:
+            raise ValueError('mask and expected lengths must match')
+        if chunk_cycles < 1:
+            raise ValueError('chunk_cycles must be positive')
+        
+        self._prepare_clocking()
+        first = None
+        count = 0
+        samples = bytearray(min(num_cycles, chunk_cycles))
+        pos = 0
+        while pos < num_cycles:
+            cycles = min(chunk_cycles, num_cycles - pos)
+            self.capture(cycles, (port,), samples, edge, clock_hz)
+            (chunk_first, chunk_count) = platform.compare_samples(expected, mask, pos, 
+                                                                  samples, cycles)
+            if first is None and chunk_first >= 0:
+                first = pos + chunk_first
+            count += chunk_count
+            pos += cycles
+        
+        return (first, count)
+        
     def _clock_pwm_deinit(self):
         if self._clock_pwm is None:
             return 
@@ -335,6 +530,7 @@ class DemoBoard:
             @param max_rp2040_freq: Maximum RP2040 frequency, overclocking above 133MHz allows higher clock frequencies
         '''
         if freqHz > 0:
+            self._prepare_clocking()
             self.pins.project_clk_driven_by_RP2(True)
             
         
@@ -408,54 +604,10 @@ class DemoBoard:
     
     
     def _get_best_rp2040_freq(self, freq:int, max_rp2040_freq:int=133_000_000):
-        # Scan the allowed RP2040 frequency range for a frequency
-        # that will divide to the target frequency well
-        min_rp2040_freq = 48_000_000
-    
-        if freq > max_rp2040_freq // 2:
-            raise ValueError("Requested frequency too high")
-        if freq <= min_rp2040_freq // (2**24 - 1):
-            raise ValueError("Requested frequency too low")
-    
-        best_freq = 0
-        best_fracdiv = 2000000000
-        best_div = 0
-    
-        rp2040_freq = min(max_rp2040_freq, freq * (2**24 - 1))
-        if rp2040_freq > 136_000_000:
-            rp2040_freq = (rp2040_freq // 2_000_000) * 2_000_000
-        else:
-            rp2040_freq = (rp2040_freq // 1_000_000) * 1_000_000
-    
-        while rp2040_freq >= 48_000_000 and rp2040_freq >= 1.9 * freq:
-            next_rp2040_freq = rp2040_freq - 1_000_000
-            if next_rp2040_freq > 136_000_000:
-                next_rp2040_freq = rp2040_freq - 2_000_000
-    
-            # Work out the closest multiple of 2 divisor that could be used
-            pwm_divisor = max((rp2040_freq // (2 * freq)) * 2, 2)
-            if abs(int(rp2040_freq / pwm_divisor + 0.5) - freq) > abs(
-                int(rp2040_freq / (pwm_divisor + 2) + 0.5) - freq
-            ):
-                pwm_divisor += 2
-    
-            # Check if the target freq will be acheived
-            fracdiv = abs(rp2040_freq / freq - pwm_divisor)
-            if freq == rp2040_freq // pwm_divisor:
-                return rp2040_freq
-            elif fracdiv < best_fracdiv:
-                best_fracdiv = fracdiv
-                best_freq = rp2040_freq
-                best_div = pwm_divisor
-    
-            rp2040_freq = next_rp2040_freq
-    
-        if best_fracdiv >= 1.0 / 256:
-            print(f"freq_jitter_free={best_freq // best_div}")
-    
-        return best_freq
-    
-    
+        # RP system clock that will divide to the target frequency well,
+        # sticking with the current one if it already does so exactly
+        return ClockPlanner.best_system_clock(freq, max_rp2040_freq, 
+                                              platform.get_RP_system_clock())
     
     def _first_encouter_reset(self, design:Design):
         if design.name not in self._project_previously_loaded:
@@ -465,6 +617,12 @@ class DemoBoard:
             time.sleep_ms(2)
             self.reset_project(False)
     
+    def _prepare_sweep(self, designs:list):
+        # shuttle sweep about to start, get the configs
+        # for all these designs at once
+        if self.apply_configs:
+            self.user_config.preload(list(map(lambda d: d.name, designs)))
+    
     def apply_user_config(self, design:Design):
         '''
             Called by shuttle (project mux) when loading a project.
@@ -531,21 +689,14 @@ class DemoBoard:
             
         if projConfig.uio_oe_pico is None:
             # no bidir direction set, ensure all are inputs
-            self.uio_oe_pico.value = 0 # all in
+            self.pins.set_bidir(0) # all in
         else:
-            self.uio_oe_pico.value = projConfig.uio_oe_pico
-            log.debug(f'Setting bidir pin direction to {hex(self.uio_oe_pico.value)}')
-                    
+            # values (if any) and directions all in one go, 
+            # only bits set as outputs actually get driven
+            log.debug(f'Setting bidir pin direction to {hex(projConfig.uio_oe_pico)}')
             if projConfig.uio_in is not None:
-                valBits = projConfig.uio_in
-                log.debug(f'Also setting bidir byte values {hex(valBits)}')
-                for i in range(8):
-                    mask = (1 << i) 
-                    if (self.uio_oe_pico.value & mask): # this is actually an output
-                        if valBits & mask: # and we want it high
-                            self.uio_in[i] = 1
-                        else: # nah, want it low
-                            self.uio_in[i] = 1
+                log.debug(f'Also setting bidir byte values {hex(projConfig.uio_in)}')
+            self.pins.set_bidir(projConfig.uio_oe_pico, projConfig.uio_in)
                             
         
         current_sys_clock = platform.get_RP_system_clock()
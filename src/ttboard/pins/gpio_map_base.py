@@ -6,8 +6,77 @@ Created on Jan 27, 2026
 '''
 from ttboard.pins.upython import Pin
 
+class GPIOMapTables:
+    '''
+        Everything Pins needs from a GPIO map, worked out once 
+        (see GPIOMapBase.tables()) into tuples and ints rather 
+        than fresh dicts and lists on every call.
+        
+          pins: ((name, gpio, default_pull), ...) in map order
+          names: all pin names, sorted
+          gpio: name->gpio dict (don't modify it)
+          always_outputs: names of pins that are always outputs
+          ui_in, uo_out, uio: pin names of each port, bit 0 first
+          ui_in_gpios, uo_out_gpios, uio_gpios: same, GPIO numbers
+          ui_in_mask, uo_out_mask, uio_mask: GPIO bit masks of each port
+    '''
+    def __init__(self, gpio_map):
+        name_to_gpio = gpio_map.all()
+        self.gpio = name_to_gpio
+        self.pins = tuple(map(lambda n: (n, name_to_gpio[n], gpio_map.default_pull(n)), 
+                              name_to_gpio.keys()))
+        self.names = tuple(sorted(name_to_gpio.keys()))
+        self.always_outputs = tuple(gpio_map.always_outputs())
+        
+        self.ui_in = self._port_names(name_to_gpio, 'ui_in')
+        self.uo_out = self._port_names(name_to_gpio, 'uo_out')
+        self.uio = self._port_names(name_to_gpio, 'uio')
+        
+        self.ui_in_gpios = tuple(map(lambda n: name_to_gpio[n], self.ui_in))
+        self.uo_out_gpios = tuple(map(lambda n: name_to_gpio[n], self.uo_out))
+        self.uio_gpios = tuple(map(lambda n: name_to_gpio[n], self.uio))
+        
+        self.ui_in_mask = self._mask(self.ui_in_gpios)
+        self.uo_out_mask = self._mask(self.uo_out_gpios)
+        self.uio_mask = self._mask(self.uio_gpios)
+        
+    @classmethod 
+    def _port_names(cls, name_to_gpio:dict, basename:str):
+        names = []
+        for i in range(8):
+            pname = f'{basename}{i}'
+            if pname in name_to_gpio:
+                names.append(pname)
+        return tuple(names)
+    
+    @classmethod 
+    def _mask(cls, gpios:tuple):
+        mask = 0
+        for g in gpios:
+            mask |= (1 << g)
+        return mask 
+    
+    def __repr__(self):
+        return f'<GPIOMapTables {len(self.pins)} pins>'
+    
+
+# GPIOMapTables per map class, the map in use depends on the board detected
+_TablesByMap = dict()
+
 class GPIOMapBase:
     
+    @classmethod 
+    def tables(cls) -> GPIOMapTables:
+        '''
+            The (cached) GPIOMapTables for this map.  
+            Use this rather than all() in anything that runs often.
+        '''
+        t = _TablesByMap.get(cls, None)
+        if t is None:
+            t = GPIOMapTables(cls)
+            _TablesByMap[cls] = t
+        return t
+    
     @classmethod 
     def project_clock(cls):
         raise RuntimeError('not implemented')
@@ -54,7 +123,7 @@ class GPIOMapBase:
         if isinstance(pin, int):
             pin_ionum = pin 
         else:
-            pin_name_to_io = cls.all()
+            pin_name_to_io = cls.tables().gpio
             if pin not in pin_name_to_io:
                 return None
             pin_ionum = pin_name_to_io[pin]
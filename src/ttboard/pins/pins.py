@@ -29,6 +29,7 @@ TLDR
 from ttboard.mode import RPMode, RPModeDEVELOPMENT
 
 import ttboard.util.platform as platform
+import ttboard.util.time as time
 from ttboard.pins.upython import Pin
 import ttboard.pins.gpio_map as gp
 from ttboard.pins.standard import StandardPin
@@ -42,6 +43,19 @@ log = logging.getLogger(__name__)
 
 
 
+class PinsSnapshot:
+    '''
+        The TT ports, all as sampled at the same instant, 
+        see Pins.snapshot()
+    '''
+    def __init__(self, raw:int):
+        self.raw = raw
+        (self.ui_in, self.uo_out, self.uio) = platform.unpack_sample(raw)
+        
+    def __repr__(self):
+        return f'<PinsSnapshot ui_in {hex(self.ui_in)} uo_out {hex(self.uo_out)} uio {hex(self.uio)}>'
+    
+
 class Pins:
     '''
         This object handles setup and provides uniform named
@@ -123,10 +137,18 @@ class Pins:
     PULL_DOWN = Pin.PULL_DOWN
     PULL_UP = Pin.PULL_UP
     
+    # pins PIO state machines route to themselves (project clock,
+    # mux select increments), behind their StandardPin's back
+    PIOPins = ('rp_projclk', 'cinc')
+    
     def __init__(self, mode:int=RPMode.SAFE):
         self.dieOnInputControlSwitchHigh = True
         self._mode = None
         self._allpins = {}
+        self._staged = None
+        self._uio_pins = tuple()
+        self.mode_switch_us = 0
+        self.mode_switch_pins_changed = 0
         self._init_ioports()
         self.mode = mode 
         
@@ -137,8 +159,8 @@ class Pins:
         # we can write ui_in, we read uo_out
         port_defs = [
             ('uo_out',  8, platform.read_uo_out_byte, None),
-            ('ui_in',   8, platform.read_ui_in_byte, platform.write_ui_in_byte),
-            ('uio_in',  8, platform.read_uio_byte, platform.write_uio_byte),
+            ('ui_in',   8, platform.read_ui_in_byte, platform.write_ui_in_byte, platform.write_ui_in_bit),
+            ('uio_in',  8, platform.read_uio_byte, platform.write_uio_byte, platform.write_uio_bit),
             ('uio_out', 8, platform.read_uio_byte, None)
             ]
         self._ports = dict()
@@ -148,7 +170,7 @@ class Pins:
             
         self.uio_oe_pico = VerilogOEPort('uio_oe_pico', 8, 
                                          platform.read_uio_outputenable, 
-                                         platform.write_uio_outputenable)
+                                         self._write_uio_outputenable)
         
         
     
@@ -174,10 +196,17 @@ class Pins:
         if set_mode not in startupMap:
             set_mode = RPMode.SAFE 
         
+        start_us = time.ticks_us()
         self._mode = set_mode
         log.info(f'Setting mode to {RPMode.to_string(set_mode)}')
         beginFunc = startupMap[set_mode]
-        beginFunc()
+        # the begin_* just stage what they want, then only 
+        # the pins that actually differ get reconfigured
+        self._staged = dict()
+        try:
+            beginFunc()
+        finally:
+            num_changed = self._apply_staged()
         if set_mode == RPMode.ASIC_RP_CONTROL:
             self.ui_in.byte_write = platform.write_ui_in_byte
             self.uio_in.byte_write = platform.write_uio_byte
@@ -185,20 +214,68 @@ class Pins:
             self.ui_in.byte_write = None 
             self.uio_in.byte_write = None
             
+        self.mode_switch_us = time.ticks_diff(time.ticks_us(), start_us)
+        self.mode_switch_pins_changed = num_changed
+        log.info(f'Mode switch took {self.mode_switch_us}us, {num_changed} pins reconfigured')
+        
+    def _set_pin(self, name:str, mode:int=None, pull:int=None):
+        p = self._allpins[name]
+        if self._staged is None:
+            # not switching modes, just do it
+            if mode is not None:
+                p.mode = mode
+            if pull is not None:
+                p.pull = pull
+            return
+        
+        (cur_mode, cur_pull) = self._staged.get(name, (p.mode, p.pull))
+        if mode is None:
+            mode = cur_mode
+        if pull is None:
+            pull = cur_pull
+        self._staged[name] = (mode, pull)
+        
+    def _apply_staged(self):
+        staged = self._staged
+        self._staged = None
+        if staged is None:
+            return 0
+        num_changed = 0
+        for name in staged:
+            (mode, pull) = staged[name]
+            # pins PIO may have taken over always get re-applied, 
+            # as do those with PWM attached (see configure())
+            if self._allpins[name].configure(mode, pull, force=(name in self.PIOPins)):
+                num_changed += 1
+        return num_changed
         
     def begin_inputs_all(self):
         
         log.debug(f'Begin inputs all with {gp.GPIOMap}')
-        always_out = gp.GPIOMap.always_outputs()
-        for name,gpio in gp.GPIOMap.all().items():
+        tables = gp.GPIOMap.tables()
+        always_out = tables.always_outputs
+        if len(self._allpins):
+            # pins exist: they're only ever created once, and 
+            # after that just reconfigured where required
+            own_staging = self._staged is None
+            if own_staging:
+                self._staged = dict()
+            for (name, _gpio, pull) in tables.pins:
+                self._set_pin(name, Pin.OUT if name in always_out else Pin.IN, pull)
+            if own_staging:
+                self._apply_staged()
+            return
+        
+        for (name, gpio, pull) in tables.pins:
             p_type = Pin.IN
-            if always_out.count(name) > 0:
+            if name in always_out:
                 p_type = Pin.OUT
-            p = StandardPin(name, gpio, p_type, pull=gp.GPIOMap.default_pull(name))
+            p = StandardPin(name, gpio, p_type, pull=pull)
             setattr(self, f'pin_{name}', p.raw_pin)
             setattr(self, name, p) # self._pinFunc(p)) 
             self._allpins[name] = p
         
+        self._uio_pins = tuple(map(lambda n: self._allpins[n], tables.uio))
         return
     
     def safe_bidir(self):
@@ -207,11 +284,39 @@ class Pins:
             
         '''
         log.debug('Setting bidirs to safe mode (inputs)')
-        for pname in gp.GPIOMap.all().keys():
-            if pname.startswith('uio'):
-                p = getattr(self, pname)
-                p.mode = Pin.IN
-                
+        self.set_bidir(0)
+        
+    def set_bidir(self, oe:int, value:int=None):
+        '''
+            Set the direction of all the uio pins at once, 
+            bit N of oe high to have the RP drive uioN, and 
+            optionally the values to drive, e.g.
+            
+              p.set_bidir(0x0f, 0x05) # uio0-3 outputs, 0 and 2 high
+              
+            The values are written first, so newly enabled outputs 
+            come up driving the right levels.
+        '''
+        if value is not None:
+            value = int(value) & 0xff
+            self.uio_in.port.do_force_update_last_value(value)
+            platform.write_uio_byte(value)
+        oe = int(oe) & 0xff
+        self.uio_oe_pico.port.do_force_update_last_value(oe)
+        self._write_uio_outputenable(oe)
+        
+    def _write_uio_outputenable(self, oe:int):
+        # single bulk write of the output enables, then
+        # keep the uio StandardPins' idea of their mode current
+        platform.write_uio_outputenable(oe)
+        for i in range(len(self._uio_pins)):
+            p = self._uio_pins[i]
+            mode = Pin.OUT if oe & (1 << i) else Pin.IN
+            if p.has_pwm:
+                # not a plain GPIO anymore, needs a real init
+                p.configure(mode, p.pull)
+            else:
+                p.track_mode(mode)
         
         
     def begin_safe(self):
@@ -225,15 +330,19 @@ class Pins:
         self.begin_inputs_all()
         self._begin_alwaysOut()
         unconfigured_pins = []
-        for pname in gp.GPIOMap.all().keys():
-            if pname.startswith('ui_in'):
-                p = getattr(self, pname)
-                if self.dieOnInputControlSwitchHigh:
-                    if p():
-                        log.warn(f'Trying to control {pname} but possible contention (it is reading HIGH)')
-                        unconfigured_pins.append(pname)
-                        continue 
-                p.mode = Pin.OUT
+        for pname in gp.GPIOMap.tables().ui_in:
+            p = getattr(self, pname)
+            if self.dieOnInputControlSwitchHigh:
+                if not p.is_input:
+                    # something may have started driving it since 
+                    # we last looked: let go of it and check again
+                    p.mode = Pin.IN
+                if p():
+                    log.warn(f'Trying to control {pname} but possible contention (it is reading HIGH)')
+                    unconfigured_pins.append(pname)
+                    self._set_pin(pname, Pin.IN)
+                    continue 
+            self._set_pin(pname, Pin.OUT)
         
         if len(unconfigured_pins):
             log.error(f'Following pins have not be set as outputs owing to contention: {",".join(unconfigured_pins)}')
@@ -254,24 +363,21 @@ class Pins:
         self.begin_inputs_all()
         self._begin_alwaysOut()
         
-        for pname in gp.GPIOMap.all().keys():
-            if pname.startswith('uo_out'):
-                p = getattr(self, pname)
-                p.mode = Pin.OUT
+        tables = gp.GPIOMap.tables()
+        for pname in tables.uo_out:
+            self._set_pin(pname, Pin.OUT)
                 
-            if pname.startswith('ui_in'):
-                p = getattr(self, pname)
-                p.pull = Pin.PULL_DOWN
+        for pname in tables.ui_in:
+            self._set_pin(pname, pull=Pin.PULL_DOWN)
                 
         self.project_clk_driven_by_RP2(True)
         
     def project_clk_driven_by_RP2(self, rpControlled:bool):
         for pname in ['rp_projclk']:
-            p = getattr(self, pname)
             if rpControlled:
-                p.mode = Pin.OUT
+                self._set_pin(pname, Pin.OUT)
             else:
-                p.mode = Pin.IN
+                self._set_pin(pname, Pin.IN)
                 
     
     def project_clk_driven_by_RP2040(self, rpControlled:bool):
@@ -280,9 +386,8 @@ class Pins:
                 
             
     def _begin_alwaysOut(self):
-        for pname in gp.GPIOMap.always_outputs():
-            p = getattr(self, pname)
-            p.mode = Pin.OUT 
+        for pname in gp.GPIOMap.tables().always_outputs:
+            self._set_pin(pname, Pin.OUT)
     
     # aliases
     @property 
@@ -302,11 +407,37 @@ class Pins:
     def dump(self):
         print(f'Pins configured in mode {RPMode.to_string(self.mode)}')
         print(f'Currently:')
-        for pname in sorted(gp.GPIOMap.all().keys()):
+        for pname in gp.GPIOMap.tables().names:
             self._dumpPin(getattr(self, pname))
     
     
     
+    def snapshot(self) -> PinsSnapshot:
+        '''
+            All of ui_in, uo_out and uio from a single read of the
+            GPIO input register(s), rather than one read per port, 
+            so they're coherent.  The uio values are the pin levels, 
+            whatever their direction.
+        '''
+        return PinsSnapshot(platform.sample_all())
+    
+    def write_ports(self, ui_in:int=None, uio_in:int=None):
+        '''
+            Set ui_in and uio_in together, in one register operation 
+            per GPIO bank, so the pins of both change at the same 
+            instant rather than one port after the other.
+            Either may be None, to leave that port alone.
+            As with uio_in.value, only uio pins set as outputs
+            are actually driven.
+        '''
+        if ui_in is not None:
+            ui_in = int(ui_in) & 0xff
+            self.ui_in.port.do_force_update_last_value(ui_in)
+        if uio_in is not None:
+            uio_in = int(uio_in) & 0xff
+            self.uio_in.port.do_force_update_last_value(uio_in)
+        platform.write_ports(ui_in, uio_in)
+    
     def list_port(self, basename:str):
         retVal = []
         
@@ -63,6 +63,32 @@ class StandardPin:
         log.debug(f'Setting pin {self.name} to {self.mode_str}')
         self.raw_pin.init(setMode, pull=self._pull)
         
+    def track_mode(self, mode:int):
+        '''
+            Note the mode was changed by someone else, e.g. a bulk 
+            write of the GPIO output enables, without touching the pin.
+        '''
+        self._mode = mode
+        
+    @property 
+    def has_pwm(self):
+        return self._pwm is not None
+        
+    def configure(self, mode:int, pull:int, force:bool=False) -> bool:
+        '''
+            Set mode and pull together, in a single init, but only
+            if either differs from what's currently set (or force).
+            Pins with PWM attached always get re-initialized.
+            @return: True if the pin was actually touched
+        '''
+        if not force and self._pwm is None and mode == self._mode and pull == self._pull:
+            return False
+        self._mode = mode
+        self._pull = pull
+        log.debug(f'Configuring pin {self.name} as {self.mode_str}')
+        self.raw_pin.init(mode, pull=pull)
+        return True
+    
     @property 
     def mode_str(self):
         modestr = 'OUT'
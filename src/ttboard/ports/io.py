@@ -4,7 +4,66 @@ Created on Nov 21, 2024
 @author: Pat Deegan
 @copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
 '''
-import microcotb.ports.io  
+import microcotb.ports.io
+from microcotb.types.logic_array import LogicArray
+from microcotb.types.range import Range
 
 class IO(microcotb.ports.io.IO):
-    pass
\ No newline at end of file
+    '''
+        microcotb IO port, with an optional write_bit_fn(bit, val)
+        so that port[i] = v goes straight to the hardware as a
+        single bit set/clear, rather than a read of the whole port,
+        a patch of the bit and a write of the whole port.
+        
+        Plain int values in range are also written straight to 
+        the port, skipping the generic LogicObject checks, and 
+        reads hand back a LogicArray that already knows its int
+        value, rather than a bit string it would need to parse.
+        int(port) skips the LogicArray altogether.
+    '''
+    def __init__(self, name:str, width:int, read_signal_fn=None, write_signal_fn=None,
+                 write_bit_fn=None):
+        super().__init__(name, width, read_signal_fn, write_signal_fn)
+        self.write_bit_fn = write_bit_fn
+        self._max_int = (1 << width) - 1
+        self._value_range = Range(width - 1, 'downto', 0)
+        
+    @property 
+    def value(self) -> LogicArray:
+        port = self.port
+        if port.signal_read is None:
+            # let it complain
+            return LogicArray._from_handle(port.get_signal_val_binstr(), on_change=self.set)
+        
+        # from the int, sharing the range
+        return LogicArray(port.do_read(), self._value_range, on_change=self.set)
+    
+    @value.setter 
+    def value(self, value):
+        if type(value) == int and 0 <= value <= self._max_int \
+            and self.port.signal_write is not None:
+            self.port.do_write(value)
+            return
+        self.set(value)
+
+    def __int__(self):
+        # straight from the port, no LogicArray in between
+        port = self.port
+        if port.signal_read is None:
+            return None
+        return port.do_read()
+
+    def __setitem__(self, key, value):
+        port = self.port
+        if self.write_bit_fn is None or port.signal_write is None \
+            or type(key) != int or not (0 <= key < port.width) \
+            or type(value) not in (int, bool):
+            # slices, Logic values etc: the long way round
+            return super().__setitem__(key, value)
+
+        bit = 1 << key
+        if value:
+            port.do_force_update_last_value(port.last_value | bit)
+        else:
+            port.do_force_update_last_value(port.last_value & ~bit)
+        self.write_bit_fn(key, value)
@@ -4,6 +4,8 @@ Created on Dec 4, 2024
 @author: Pat Deegan
 @copyright: Copyright (C) 2024 Pat Deegan, https://psychogenic.com
 '''
+from array import array
+import struct
 import ttboard.log as logging
 log = logging.getLogger(__name__)
 
@@ -43,21 +45,34 @@ class Serializable:
     BytesForStringLen = 1
     StringEncoding = 'ascii'
     ByteOrder = 'big'
+    HeaderMagic = b'TTSER'
+    HeaderBytes = 6 # version byte + magic
+    MaxSupportedVersion = 3
     
     def __init__(self):
         pass
     
-    def to_bin_file(self, fpath:str):
+    @classmethod 
+    def bin_header(cls, version:int) -> bytes:
+        return cls.serialize_int(version, 1) + cls.HeaderMagic
+    
+    def to_bin_file(self, fpath:str, version:int=None):
+        if version is None:
+            version = self.SerializerVersion
         with open(fpath, 'wb') as f:
-            f.write(self.serialize_int(self.SerializerVersion, 1))
-            f.write(b'TTSER')
-            f.write(self.serialize())
+            f.write(self.bin_header(version))
+            f.write(self.serialize(version))
             f.close()
     
     def bin_header_valid(self, bytestream):
+        '''
+            Returns the serializer version found in the
+            header (v1 through v3 are understood), or None
+            if this isn't a file we can read.
+        '''
         version = self.deserialize_int(bytestream, 1)
         header = bytestream.read(5)
-        if header == b'TTSER':
+        if header == self.HeaderMagic and version <= self.MaxSupportedVersion:
             return version
     
     def from_bin_file(self, fpath:str):
@@ -66,7 +81,7 @@ class Serializable:
             if not version:
                 raise ValueError(f'bad header in {fpath}')
             log.info(f'Deserializing from v{version} file {fpath}')
-            self.deserialize(f)
+            self.deserialize(f, version)
             f.close()
         
         
@@ -162,16 +177,20 @@ class Serializable:
                 
                     
                 
-    def serialize(self):
+    def serialize(self, version:int=None):
         raise RuntimeError('Override me')
     
-    def deserialize(self, bytestream):
+    def deserialize(self, bytestream, version:int=None):
         raise RuntimeError('Override me')
 
 class Design(Serializable):
     SerializeClockBytes = 4
     SerializePayloadSizeBytes = 1
     SerializeAddressBytes = 2
+    # struct equivalents of the above, big endian (ByteOrder)
+    RecordHeaderStruct = '>HB' # address, payload size
+    RecordHeaderLen = 3
+    RecordTailStruct = '>BI' # danger level, clock_hz, following the name
     def __init__(self, projectMux, projname:str='NOTSET', projindex:int=0, info:dict=None):
         super().__init__()
         self.mux = projectMux
@@ -189,10 +208,7 @@ class Design(Serializable):
         
         self.macro = info['macro']
         
-        if 'danger_level' in info:
-            self.danger_level = DangerLevel.string_to_level(info['danger_level'])
-        else:
-            self.danger_level = DangerLevel.SAFE
+        self.danger_level = self.danger_level_from_info(info)
         
         if 'repo' in info:
             self.repo = info['repo']
@@ -201,6 +217,12 @@ class Design(Serializable):
             self.commit = info['commit']
         self.clock_hz = int(info['clock_hz'])
         
+    @classmethod 
+    def danger_level_from_info(cls, info:dict):
+        if 'danger_level' in info:
+            return DangerLevel.string_to_level(info['danger_level'])
+        return DangerLevel.SAFE
+        
     @classmethod 
     def get_address_and_size_from(cls, bytestream):
         
@@ -208,6 +230,32 @@ class Design(Serializable):
         size = cls.deserialize_int(bytestream, cls.SerializePayloadSizeBytes)
         return (addr, size)
     
+    @classmethod 
+    def unpack_record_from(cls, buf, pos:int):
+        '''
+            Unpacks the record starting at pos in buf (ideally 
+            a memoryview) without copying anything out of it.
+            Returns 
+              (address, next record pos, name start, name len, danger level, clock_hz)
+            or None if buf doesn't hold a complete record at pos.
+            @raise ValueError: if the record is malformed
+        '''
+        payload_pos = pos + cls.RecordHeaderLen
+        if payload_pos > len(buf):
+            return None
+        (address, size) = struct.unpack_from(cls.RecordHeaderStruct, buf, pos)
+        next_pos = payload_pos + size
+        if next_pos > len(buf):
+            return None
+        if not size:
+            raise ValueError(f'empty record at {pos}')
+        name_len = buf[payload_pos]
+        name_start = payload_pos + cls.BytesForStringLen
+        if name_start + name_len + struct.calcsize(cls.RecordTailStruct) > next_pos:
+            raise ValueError(f'record at {pos} overruns its size')
+        (danger_level, clock_hz) = struct.unpack_from(cls.RecordTailStruct, buf, name_start + name_len)
+        return (address, next_pos, name_start, name_len, danger_level, clock_hz)
+    
     @property 
     def project_index(self):
         return self.count 
@@ -222,7 +270,7 @@ class Design(Serializable):
     def disable(self):
         self.mux.disable()
         
-    def serialize(self):
+    def serialize(self, version:int=None):
         payload_data = [
                 self.name,
                 self.danger_level,
@@ -239,7 +287,7 @@ class Design(Serializable):
         all_data = self.serialize_list(header) + payload_bytes
         return all_data
         
-    def deserialize(self, bytestream):
+    def deserialize(self, bytestream, version:int=None):
         
         addr, _size = self.get_address_and_size_from(bytestream)
         self.count = addr
@@ -264,31 +312,252 @@ class DesignStub:
     '''
         A yet-to-be-loaded design, just a pointer that will 
         auto-load the design if accessed.
-        Has a side effect of replacing itself as an attribute
-        in the design index so this only happens once.
+        Loading goes through the design index, so the 
+        resulting Design is shared with anyone else asking
+        for that project.  The stub doesn't hang on to it, 
+        so the index's cache is free to evict it again later.
     '''
     def __init__(self, design_index, address:int):
         self.design_index = design_index
         self.count = address
-        # self.name = projname 
-        self._des = None
     
     def _lazy_load(self):
-        des = self.design_index.load_project(self.project_index)
-        setattr(self.design_index, des.name, des)
-        self._des = des
-        return des
+        return self.design_index.get(self.project_index)
     
     @property 
     def project_index(self):
         return self.count
     
     def __getattr__(self, name:str):
-        if hasattr(self, '_des') and self._des is not None:
-            des = self._des
-        else:
-            des = self._lazy_load()
-        return getattr(des, name)
+        return getattr(self._lazy_load(), name)
     
     def __repr__(self):
         return f'<Design {self.project_index} (uninit)>'
+    
+
+class DesignCache:
+    '''
+        Least recently used cache of materialized Design objects,
+        by project address.
+        
+        Bounded by a number of designs (max_designs) and/or an 
+        estimate of the bytes they hold (max_bytes), 0 meaning 
+        no limit.  Once over, the designs that have gone unused 
+        the longest are dropped, and will be loaded anew 
+        (from the design table or shuttle file) if asked for again.
+        
+        Hits and misses are counted, see stats, to help size it.
+    '''
+    # rough cost of a Design object, not counting its name
+    DesignBytesEstimate = 160
+    
+    def __init__(self, max_designs:int=0, max_bytes:int=0):
+        self.max_designs = max_designs
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.clear()
+        
+    def clear(self):
+        self._designs = dict()
+        self._last_used = dict()
+        self._tick = 0
+        self._bytes = 0
+        
+    def resize(self, max_designs:int=0, max_bytes:int=0):
+        self.max_designs = max_designs
+        self.max_bytes = max_bytes
+        self._evict()
+        
+    @classmethod 
+    def size_estimate(cls, des:Design) -> int:
+        return cls.DesignBytesEstimate + len(des.name)
+    
+    def peek(self, address:int) -> Design:
+        '''
+            The cached design, if any, without counting it as a use
+        '''
+        return self._designs.get(address)
+    
+    def get(self, address:int) -> Design:
+        des = self._designs.get(address)
+        if des is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touch(address)
+        return des
+    
+    def put(self, des:Design):
+        address = des.count
+        if address in self._designs:
+            self._bytes -= self.size_estimate(self._designs[address])
+        self._designs[address] = des
+        self._bytes += self.size_estimate(des)
+        self._touch(address)
+        self._evict()
+        
+    def remove(self, address:int):
+        if address not in self._designs:
+            return
+        self._bytes -= self.size_estimate(self._designs[address])
+        del self._designs[address]
+        del self._last_used[address]
+        
+    def values(self):
+        return self._designs.values()
+    
+    @property 
+    def stats(self) -> dict:
+        return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'designs': len(self._designs),
+                'bytes': self._bytes
+            }
+        
+    def _touch(self, address:int):
+        self._tick += 1
+        self._last_used[address] = self._tick
+        
+    def _over_limit(self) -> bool:
+        if self.max_designs and len(self._designs) > self.max_designs:
+            return True 
+        if self.max_bytes and self._bytes > self.max_bytes and len(self._designs) > 1:
+            return True
+        return False
+    
+    def _evict(self):
+        while self._over_limit():
+            oldest = None
+            for address in self._last_used:
+                if oldest is None or self._last_used[address] < self._last_used[oldest]:
+                    oldest = address
+            self.remove(oldest)
+            self.evictions += 1
+    
+    def __contains__(self, address:int):
+        return address in self._designs
+            
+    def __len__(self):
+        return len(self._designs)
+    
+    def __repr__(self):
+        return f'<DesignCache {len(self)} designs, {self.hits} hits, {self.misses} misses>'
+
+
+class DesignTable:
+    '''
+        Compact, column-wise, storage for every design on a shuttle.
+        
+        Rather than holding an object per project, the columns are
+          * addresses: array('H')
+          * clock_hz: array('I')
+          * danger_levels: bytearray
+          * names: a single blob of newline-separated names, with 
+            the start of each name in an array('I')
+        so a shuttle of hundreds of projects is a handful of 
+        allocations.  Names are only decoded when asked for.
+        
+        Call done() once everything is appended, lookups are only 
+        valid after that.
+    '''
+    NameSeparator = b'\n'
+    def __init__(self):
+        self.clear()
+        
+    def clear(self):
+        self.addresses = array('H')
+        self.clock_hz = array('I')
+        self.danger_levels = bytearray()
+        self._names = bytearray(self.NameSeparator)
+        self._name_starts = array('I')
+        # project address -> row + 1, 0 when unused
+        self._by_address = array('H')
+        
+    def append(self, address:int, name, danger_level:int, clock_hz:int):
+        if isinstance(name, str):
+            name = name.encode(Serializable.StringEncoding)
+        self.addresses.append(address)
+        self.clock_hz.append(clock_hz)
+        self.danger_levels.append(danger_level)
+        self._name_starts.append(len(self._names))
+        self._names += name 
+        self._names += self.NameSeparator
+        
+    def done(self):
+        self._names = bytes(self._names)
+        num_addresses = 0
+        if len(self.addresses):
+            num_addresses = max(self.addresses) + 1
+        self._by_address = array('H', bytearray(2*num_addresses))
+        for idx in range(len(self.addresses)-1, -1, -1):
+            # go backwards so first entry for an address wins
+            self._by_address[self.addresses[idx]] = idx + 1
+            
+    def name(self, idx:int) -> str:
+        start = self._name_starts[idx]
+        end = self._names.find(self.NameSeparator, start)
+        return self._names[start:end].decode(Serializable.StringEncoding)
+    
+    def index_of_address(self, address:int) -> int:
+        if address < 0 or address >= len(self._by_address):
+            return -1
+        return self._by_address[address] - 1
+    
+    def index_of_name(self, name:str) -> int:
+        if not len(name):
+            return -1
+        needle = self.NameSeparator + name.encode(Serializable.StringEncoding) + self.NameSeparator
+        # last entry for a name wins, as it did in the JSON index
+        pos = self._names.rfind(needle)
+        if pos < 0:
+            return -1
+        return self._index_at_position(pos + 1)
+    
+    def indices_by_address(self):
+        '''
+            Row index for each address in use, in address order
+        '''
+        for addr_idx in self._by_address:
+            if addr_idx:
+                yield addr_idx - 1
+    
+    def find(self, search:str) -> list:
+        '''
+            Row indices of all names containing search, in address order
+        '''
+        if not len(search):
+            found = list(range(len(self.addresses)))
+            found.sort(key=lambda idx: self.addresses[idx])
+            return found
+        needle = search.encode(Serializable.StringEncoding)
+        if self.NameSeparator in needle:
+            return []
+        found = []
+        pos = self._names.find(needle)
+        while pos >= 0:
+            idx = self._index_at_position(pos)
+            found.append(idx)
+            # skip any other hits in the same name
+            next_name = self._names.find(self.NameSeparator, pos) + 1
+            pos = self._names.find(needle, next_name)
+        found.sort(key=lambda idx: self.addresses[idx])
+        return found
+        
+    def _index_at_position(self, pos:int) -> int:
+        # last row with a name starting at or before pos
+        low = 0
+        high = len(self._name_starts)
+        while high - low > 1:
+            mid = (low + high) // 2
+            if self._name_starts[mid] <= pos:
+                low = mid
+            else:
+                high = mid
+        return low
+    
+    def __len__(self):
+        return len(self.addresses)
@@ -11,18 +11,20 @@ two implementations, one that only ever gets used as
 a fallback and in the UF2 creation.
 '''
 
-import json
 import re 
 import gc
 import os
 import ttboard.util.time as time
+import ttboard.util.platform as platform
 from ttboard.pins.pins import Pins
 from ttboard.boot.rom import ChipROM
 from ttboard.boot.shuttle_properties import HardcodedShuttle
+import ttboard.util.json_stream as json_stream
 import ttboard.log as logging
-from ttboard.project_design import Serializable, DangerLevel, Design, DesignStub
+from ttboard.project_design import Serializable, DangerLevel, Design, DesignStub, DesignTable, DesignCache
 log = logging.getLogger(__name__)
 
+# default for the strict_memory_saving policy, see DesignIndex
 StrictMemorySaving = False
 '''
 Fetched with
@@ -32,14 +34,37 @@ https://index.tinytapeout.com/tt0X.json?fields=address,clock_hz,title,dange_fiel
    
 class DesignIndex(Serializable):
     SerializedBinSuffix = 'bin'
+    SerializerVersion = 3
+    IndexCountBytes = 2
+    IndexOffsetBytes = 4
+    # v3 sections, each tagged and sized
+    SectionsLenBytes = 4
+    SectionTagBytes = 1
+    SearchSectionTag = 1
+    NameHashSectionTag = 2
+    TrigramLen = 3
+    TrigramEntryBytes = TrigramLen + IndexOffsetBytes + IndexCountBytes
+    # records are read this much at a time when loading, 
+    # must be more than the largest record (258 bytes)
+    DeserializeChunkBytes = 1024
     BadCharsRe = re.compile(r'[^\w\d\s]+')
     SpaceCharsRe = re.compile(r'\s+')
     
-    def __init__(self, projectMux,  src_JSON_file:str=None):
+    def __init__(self, projectMux,  src_JSON_file:str=None, 
+                 max_cached_designs:int=0, max_cached_bytes:int=0, 
+                 strict_memory_saving:bool=None):
         self._src_json = src_JSON_file
         self._src_serialized_bin = None
         self._project_mux = projectMux
         self._num_projects = 0
+        self._table = DesignTable()
+        # name hash fingerprints, from v3 bin files, see name_may_exist()
+        self._name_fingerprints = None
+        self._name_hash_offsets_pos = 0
+        # materialized Design objects, by project address
+        self.cache = DesignCache()
+        self.strict_memory_saving = False
+        self.configure_cache(max_cached_designs, max_cached_bytes, strict_memory_saving)
         if src_JSON_file is not None:
             self.load_available(src_JSON_file)
         
@@ -75,32 +100,36 @@ class DesignIndex(Serializable):
                 return 
         try:
             with open(src_JSON_file) as fh:
-                index = json.load(fh)
                 self._num_projects = 0
-                for project in index['projects']:
-                    project_address = int(project['address'])
-                    attrib_name = self.clean_project_name(project)
-                    des = Design(self._project_mux, attrib_name, project_address, project)
-                    setattr(self, attrib_name, des)
+                self._name_fingerprints = None
+                self._table.clear()
+                # stream the projects, one at a time, rather 
+                # than json.load()ing the entire index
+                for project in json_stream.array_items(fh, 'projects'):
+                    self._table.append(int(project['address']), 
+                                       self.clean_project_name(project), 
+                                       Design.danger_level_from_info(project),
+                                       int(project['clock_hz']))
                     self._num_projects += 1
-                index = None
+                self._table.done()
         except OSError:
             log.error(f'Could not open shuttle index {src_JSON_file}')
             
         gc.collect()
             
              
-    def clean_project_name(self, project:dict):
+    @classmethod 
+    def clean_project_name(cls, project:dict):
         attrib_name = project['macro']
-        attrib_name = self._wokwi_name_cleanup(attrib_name, project)
+        attrib_name = cls._wokwi_name_cleanup(attrib_name, project)
             
-        return self.serializable_string(attrib_name)
+        return cls.serializable_string(attrib_name)
     
-        
-    def _wokwi_name_cleanup(self, name:str, info:dict):
+    @classmethod 
+    def _wokwi_name_cleanup(cls, name:str, info:dict):
         # special cleanup for wokwi gen'ed names
         if name.startswith('tt_um_wokwi') and 'title' in info and len(info['title']):
-            new_name = self.SpaceCharsRe.sub('_', self.BadCharsRe.sub('', info['title'])).lower()
+            new_name = cls.SpaceCharsRe.sub('_', cls.BadCharsRe.sub('', info['title'])).lower()
             if len(new_name):
                 name = f'wokwi_{new_name}_{name[-3:]}'
         
@@ -109,51 +138,125 @@ class DesignIndex(Serializable):
     def count(self):
         return self._num_projects
     
+    def configure_cache(self, max_designs:int=0, max_bytes:int=0, strict_memory_saving:bool=None):
+        '''
+            Bound the number (max_designs) and/or estimated size (max_bytes)
+            of Design objects kept around, 0 for no limit.
+            The strict_memory_saving policy keeps a single design, and 
+            no table of all the projects when loading from a bin file,
+            at the cost of going to flash for most everything.
+        '''
+        if strict_memory_saving is None:
+            strict_memory_saving = StrictMemorySaving
+        self.strict_memory_saving = strict_memory_saving
+        if strict_memory_saving:
+            max_designs = 1
+        self.cache.resize(max_designs, max_bytes)
     
-    def _get_design_attribs(self) -> list:
-        
-        badlist = ['all', 'names']
-        m =  map(lambda x: getattr(self, x), 
-                 filter( lambda x: x not in badlist,
-                         filter( lambda x: not x.startswith('_'), self.__dict__.keys())))
-        des_attribs = list(filter(lambda x: isinstance(x, (Design, DesignStub)), m))
-        return des_attribs
+    @property 
+    def cache_stats(self) -> dict:
+        return self.cache.stats
+    
+    
+    def _design_for_row(self, idx:int) -> Design:
+        address = self._table.addresses[idx]
+        des = self.cache.get(address)
+        if des is None:
+            des = self._new_design_from_row(idx)
+            self.cache.put(des)
+        return des
     
+    def _new_design_from_row(self, idx:int) -> Design:
+        des = Design(self._project_mux, self._table.name(idx), self._table.addresses[idx])
+        des.danger_level = self._table.danger_levels[idx]
+        des.clock_hz = self._table.clock_hz[idx]
+        return des
+    
+    def _loaded_design_named(self, project_name:str) -> Design:
+        for des in self.cache.values():
+            if des.name == project_name:
+                return des
+        return None
+    
+    def _reload_evicted(self, project) -> Design:
+        # with strict_memory_saving there's no table to fall back on, 
+        # designs evicted from the cache come back from the shuttle file
+        if not (self.strict_memory_saving and self._src_serialized_bin):
+            return None
+        if isinstance(project, int):
+            des = self.deserialize_design_by_address(self._src_serialized_bin, project)
+        elif not self.name_may_exist(project):
+            return None
+        elif self._name_fingerprints is not None:
+            des = self._hashed_design_by_name(project)
+        else:
+            des = self.deserialize_design_by_name(self._src_serialized_bin, project)
+        if des is not None:
+            self._remember(des)
+        return des
+    
+    def _design_named(self, project_name:str) -> Design:
+        if not self.name_may_exist(project_name):
+            return None
+        idx = self._table.index_of_name(project_name)
+        if idx >= 0:
+            return self._design_for_row(idx)
+        des = self._loaded_design_named(project_name)
+        if des is None:
+            des = self._reload_evicted(project_name)
+        return des
+    
+    def _design_at_address(self, project_address:int) -> Design:
+        idx = self._table.index_of_address(project_address)
+        if idx >= 0:
+            return self._design_for_row(idx)
+        # not in the table, maybe loaded some other way
+        des = self.cache.get(project_address)
+        if des is None:
+            des = self._reload_evicted(project_address)
+        return des
+    
+    def _remember(self, des:Design):
+        self.cache.put(des)
     
     @property 
     def all(self):
         '''
             all available projects in the shuttle, whether loaded or not 
         '''
-        if StrictMemorySaving and self._src_serialized_bin:
+        if self.strict_memory_saving and self._src_serialized_bin:
             return []
         
-        des_attribs = self._get_design_attribs()
-        return sorted(des_attribs, key=lambda x: x.count)
+        des_list = []
+        for idx in self._table.indices_by_address():
+            address = self._table.addresses[idx]
+            des = self.cache.peek(address)
+            if des is None:
+                des = DesignStub(self, address)
+            des_list.append(des)
+        return des_list
     
     
     def find(self, search:str) -> list:
+        if len(self._table):
+            return list(map(lambda idx: self._design_for_row(idx), self._table.find(search)))
+        
         if self._src_serialized_bin:
-            # we can never be certain we have them all loaded as 
-            # Design (rather than DesignStub), so scan the whole file,
-            # just the once (rather than repeatedly if lazyloading stubs)
+            # nothing held in memory, scan the whole file
             return self.deserialize_find_names(self._src_serialized_bin, search)
         
-        return list(filter(lambda p: p.name.find(search) >= 0,  self.all))
+        return []
     
     
     def get(self, project_name:str) -> Design:
         # not in list of available, maybe it's an integer?
         if isinstance(project_name, int):
-            str_name = self.project_name(project_name)
-            if str_name is not None:
-                return self.get(str_name)
-            else:
-                return self.load_project(project_name)
-                raise AttributeError(f'No project @ address "{project_name}"') 
-            
-        if hasattr(self, project_name):
-            return getattr(self, project_name)
+            des = self._design_at_address(project_name)
+        else:
+            des = self._design_named(project_name)
+        
+        if des is not None:
+            return des
         
         return self.load_project(project_name)
         
@@ -182,18 +285,24 @@ class DesignIndex(Serializable):
                 if project_address is not None:
                     loaded_project = self.deserialize_design_by_address(serialized_fpath, project_address)
                 elif project_name is not None and len(project_name):
-                    loaded_project = self.deserialize_design_by_name(serialized_fpath, project_name)
+                    if self._name_fingerprints is not None and serialized_fpath == self._src_serialized_bin:
+                        loaded_project = self._hashed_design_by_name(project_name)
+                    else:
+                        loaded_project = self.deserialize_design_by_name(serialized_fpath, project_name)
                 
                 if loaded_project is None:
                     raise AttributeError(f'Unknown project ({project_name})') 
-                setattr(self, loaded_project.name, loaded_project)
+                self._remember(loaded_project)
                 return loaded_project
         try:
             with open(self._src_json) as fh:
                 log.debug(f"LOADING {self._src_json}")
-                index = json.load(fh)
-                for project in index['projects']:
-                    if force_all or int(project['address']) == project_address:
+                for project in json_stream.array_items(fh, 'projects'):
+                    if project_address is not None:
+                        is_match = int(project['address']) == project_address
+                    else:
+                        is_match = self.clean_project_name(project) == project_name
+                    if force_all or is_match:
                         # this is our guy
                         if project_name is None or not len(project_name):
                             pname = self._wokwi_name_cleanup(project['macro'], project)
@@ -203,9 +312,8 @@ class DesignIndex(Serializable):
                         if des.danger_level > max_allowable_danger:
                             log.error(f'Design {des.name} danger exceeds max allowed {DangerLevel.level_to_str(max_allowable_danger)}')
                             continue
-                        setattr(self, des.name, des)
+                        self._remember(des)
                         log.debug(f'Loaded project {des.name}')
-                        index = None
                         if not force_all:
                             gc.collect()
                             return des
@@ -221,58 +329,514 @@ class DesignIndex(Serializable):
         
         
     def is_available(self, project_name:str):
-        if hasattr(self, project_name):
+        if not self.name_may_exist(project_name):
+            return False
+        if self._table.index_of_name(project_name) >= 0:
             return True 
-        if StrictMemorySaving and self._src_serialized_bin:
+        if self._loaded_design_named(project_name) is not None:
+            return True
+        if self.strict_memory_saving and self._src_serialized_bin:
+            if self._name_fingerprints is not None:
+                des = self._hashed_design_by_name(project_name)
+                if des is None:
+                    return False
+                self._remember(des)
+                return True
             x = list(filter(lambda x: x.name == project_name, self.find(project_name)))
             return len(x)
         
         return False
     
     def project_index(self, project_name:str) -> int:
-        if self.is_available(project_name):
-            # return self._available_projects[project_name]
-            return getattr(self, project_name).count
+        idx = self._table.index_of_name(project_name)
+        if idx >= 0:
+            return self._table.addresses[idx]
+        
+        des = self._loaded_design_named(project_name)
+        if des is None:
+            des = self._reload_evicted(project_name)
+        if des is not None:
+            return des.count
         
         return None   
     
     
     def project_name(self, from_address:int) -> str:
-        des_attribs = self._get_design_attribs()
-        found = list(filter(lambda x: x.count == from_address, des_attribs))
-        if len(found):
-            return found[0].name
+        idx = self._table.index_of_address(from_address)
+        if idx >= 0:
+            return self._table.name(idx)
+        
+        des = self.cache.peek(from_address)
+        if des is None:
+            des = self._reload_evicted(from_address)
+        if des is not None:
+            return des.name
         return None
     
         
-    def serialize(self):
-        self.load_all()
-        bts = bytearray()
-        processed = dict()
-        for ades in self.all:
-            if ades.project_index in processed:
-                continue 
-            processed[ades.project_index] = True
-            pname = self.project_name(ades.project_index)
-            ades.name = pname
+    def serialize(self, version:int=None):
+        if version is None:
+            version = self.SerializerVersion
+        records = []
+        rows = map(lambda i: (self._table.addresses[i], self._table.name(i), i), 
+                   range(len(self._table)))
+        for (_addr, _name, idx) in self.unique_entries(rows):
+            ades = self._new_design_from_row(idx)
+            try:
+                records.append((ades.project_index, ades.name, ades.serialize()))
+            except Exception as e:
+                log.error(str(e))
+                log.error(f'Problem serializing {str(ades)}')
+        
+        return self.serialize_records(records, version)
+    
+    @classmethod 
+    def compile_json(cls, json_fh, version:int=None):
+        '''
+            Single pass conversion of the shuttle JSON index streamed from
+            json_fh straight to serialized records, without building an
+            index (or any Design beyond the one at hand) along the way.
+            Produces exactly what serialize() would for the same JSON.
+        '''
+        if version is None:
+            version = cls.SerializerVersion
+        entries = []
+        for project in json_stream.array_items(json_fh, 'projects'):
+            address = int(project['address'])
+            name = cls.clean_project_name(project)
+            ades = Design(None, name, address, project)
             try:
-                bts += ades.serialize()
+                entries.append((address, name, ades.serialize()))
             except Exception as e:
                 log.error(str(e))
                 log.error(f'Problem serializing {str(ades)}')
+        
+        return cls.serialize_records(cls.unique_entries(entries), version)
+    
+    @classmethod 
+    def unique_entries(cls, entries) -> list:
+        '''
+            Which of the shuttle projects get serialized.
+            As has always been the case when loading the JSON, a later 
+            project with the same name replaces an earlier one (keeping 
+            its place), then the first project at an address wins.
+            @param entries: (address, name, ...) tuples, in JSON order
+            @return: the retained entries, in address order
+        '''
+        by_name = dict()
+        for ent in entries:
+            by_name[ent[1]] = ent
+        by_address = dict()
+        for ent in by_name.values():
+            if ent[0] not in by_address:
+                by_address[ent[0]] = ent
+        return list(map(lambda a: by_address[a], sorted(by_address.keys())))
+    
+    @classmethod 
+    def compile_json_to_bin_file(cls, src_JSON_file:str, fpath:str, version:int=None):
+        if version is None:
+            version = cls.SerializerVersion
+        with open(src_JSON_file) as fh:
+            bts = cls.compile_json(fh, version)
+        with open(fpath, 'wb') as f:
+            f.write(cls.bin_header(version))
+            f.write(bts)
+            f.close()
+    
+    @classmethod 
+    def serialize_records(cls, records:list, version:int):
+        '''
+            @param records: list of (address, name, record bytes) tuples,
+            in address order
+        '''
+        if version < 2:
+            bts = bytearray()
+            for rec in records:
+                bts += rec[2]
+            return bts
+        
+        return cls.serialize_indexed(records, version)
+    
+    @classmethod 
+    def serialize_indexed(cls, records:list, version:int=2):
+        '''
+            v2 layout, following the version+TTSER header:
+            
+              num_projects       (IndexCountBytes)
+              address table len  (IndexCountBytes), max address + 1
+              address table      (IndexOffsetBytes each), record offset
+                                 for each address, 0 if unused
+              name table         (IndexOffsetBytes each), record offsets
+                                 sorted by project name
+              records            same as v1 records
+            
+            v3 is the same, but has a block of sections right after 
+            the address table len:
+              sections len       (SectionsLenBytes), total of all sections
+              sections           each a tag (SectionTagBytes), 
+                                 a len (SectionsLenBytes) and that many
+                                 bytes of data.  Unknown tags are skipped.
             
+            All offsets are absolute, from start of file.
+            @param records: list of (address, name, record bytes) tuples
+        '''
+        num_records = len(records)
+        addr_table_len = 0
+        if num_records:
+            addr_table_len = max(map(lambda r: r[0], records)) + 1
+        
+        name_order = sorted(range(num_records), key=lambda i: records[i][1])
+        
+        pos = cls.HeaderBytes + 2*cls.IndexCountBytes
+        sections = bytearray()
+        if version >= 3:
+            pos += cls.SectionsLenBytes
+            sections += cls._serialize_section(cls.SearchSectionTag, 
+                            cls._search_section(list(map(lambda i: records[i][1], name_order)),
+                                                pos + cls.SectionTagBytes + cls.SectionsLenBytes))
+            pos += len(sections)
+            # the name hash needs the record offsets, but its size is known
+            num_slots = cls._name_hash_slots(num_records)
+            pos += cls.SectionTagBytes + cls.SectionsLenBytes + cls.IndexOffsetBytes + \
+                    num_slots*(1 + cls.IndexOffsetBytes)
+            
+        pos += cls.IndexOffsetBytes*(addr_table_len + num_records)
+        offsets = []
+        addr_table = [0]*addr_table_len
+        for rec in records:
+            offsets.append(pos)
+            addr_table[rec[0]] = pos
+            pos += len(rec[2])
+        
+        if version >= 3:
+            sections += cls._serialize_section(cls.NameHashSectionTag, 
+                            cls._name_hash_section(list(map(lambda r: r[1], records)), offsets))
+        
+        bts = bytearray()
+        bts += cls.serialize_int(num_records, cls.IndexCountBytes)
+        bts += cls.serialize_int(addr_table_len, cls.IndexCountBytes)
+        if version >= 3:
+            bts += cls.serialize_int(len(sections), cls.SectionsLenBytes)
+            bts += sections
+        for offset in addr_table:
+            bts += cls.serialize_int(offset, cls.IndexOffsetBytes)
+        for i in name_order:
+            bts += cls.serialize_int(offsets[i], cls.IndexOffsetBytes)
+        for rec in records:
+            bts += rec[2]
+        
         return bts
 
+    @classmethod 
+    def _serialize_section(cls, tag:int, data:bytearray):
+        bts = bytearray()
+        bts += cls.serialize_int(tag, cls.SectionTagBytes)
+        bts += cls.serialize_int(len(data), cls.SectionsLenBytes)
+        bts += data
+        return bts
+    
+    @classmethod 
+    def name_hash(cls, project_name:str) -> int:
+        # FNV-1a, 32 bits, so it's the same everywhere
+        h = 0x811c9dc5
+        for b in project_name.encode(cls.StringEncoding):
+            h = ((h ^ b) * 0x01000193) & 0xffffffff
+        return h
+    
+    @classmethod 
+    def _name_fingerprint(cls, h:int) -> int:
+        # 0 is reserved for empty slots
+        return (h >> 24) or 1
+    
+    @classmethod 
+    def _name_hash_slots(cls, num_names:int) -> int:
+        # power of 2, no more than half full
+        num_slots = 1
+        while num_slots < 2*num_names:
+            num_slots *= 2
+        return num_slots
+    
+    @classmethod 
+    def _name_hash_section(cls, names:list, offsets:list):
+        '''
+            Open addressing (linear probe) hash table of the names,
+            keyed on name_hash():
+              num slots      (IndexOffsetBytes), a power of 2
+              fingerprints   (1 byte each), top byte of the hash, 0 if empty
+              offsets        (IndexOffsetBytes each), record offsets
+            The fingerprints are small enough to keep in RAM, which 
+            settles most lookups of names that aren't there without
+            any reads.
+        '''
+        num_slots = cls._name_hash_slots(len(names))
+        fingerprints = bytearray(num_slots)
+        slot_offsets = [0]*num_slots
+        for i in range(len(names)):
+            h = cls.name_hash(names[i])
+            slot = h & (num_slots - 1)
+            while fingerprints[slot]:
+                slot = (slot + 1) & (num_slots - 1)
+            fingerprints[slot] = cls._name_fingerprint(h)
+            slot_offsets[slot] = offsets[i]
+            
+        bts = bytearray()
+        bts += cls.serialize_int(num_slots, cls.IndexOffsetBytes)
+        bts += fingerprints
+        for offset in slot_offsets:
+            bts += cls.serialize_int(offset, cls.IndexOffsetBytes)
+        return bts
+    
+    @classmethod 
+    def _search_section(cls, sorted_names:list, data_pos:int):
+        '''
+            Trigram index of the names, so find() doesn't need to go 
+            through every record:
+              num trigrams     (IndexOffsetBytes)
+              trigram table    (TrigramEntryBytes each), sorted by trigram:
+                               the trigram, absolute offset of its postings
+                               and the number of postings
+              postings         (IndexCountBytes each), positions in the 
+                               name table of every name with that trigram
+            @param sorted_names: names, in name table order
+            @param data_pos: absolute offset at which this data will sit  
+        '''
+        postings = dict()
+        for rank in range(len(sorted_names)):
+            name = sorted_names[rank].encode(cls.StringEncoding)
+            for i in range(len(name) - cls.TrigramLen + 1):
+                trigram = name[i:i + cls.TrigramLen]
+                if trigram not in postings:
+                    postings[trigram] = []
+                if not len(postings[trigram]) or postings[trigram][-1] != rank:
+                    postings[trigram].append(rank)
+        
+        trigrams = sorted(postings.keys())
+        pos = data_pos + cls.IndexOffsetBytes + cls.TrigramEntryBytes*len(trigrams)
+        table = bytearray()
+        ranks = bytearray()
+        table += cls.serialize_int(len(trigrams), cls.IndexOffsetBytes)
+        for trigram in trigrams:
+            table += trigram 
+            table += cls.serialize_int(pos + len(ranks), cls.IndexOffsetBytes)
+            table += cls.serialize_int(len(postings[trigram]), cls.IndexCountBytes)
+            for rank in postings[trigram]:
+                ranks += cls.serialize_int(rank, cls.IndexCountBytes)
+        
+        return table + ranks
+        
     def from_bin_file(self, fpath:str):
         super().from_bin_file(fpath)
         gc.collect()
         return self._num_projects
     
+    def _indexed_layout(self, bytestream, version:int=2):
+        '''
+            For v2+ files, with bytestream positioned right 
+            after the header, returns
+            (num_projects, addr_table_len, addr_table_pos, name_table_pos, 
+                records_pos, sections_pos, sections_len)
+        '''
+        num_projects = self.deserialize_int(bytestream, self.IndexCountBytes)
+        addr_table_len = self.deserialize_int(bytestream, self.IndexCountBytes)
+        sections_len = 0
+        if version >= 3:
+            sections_len = self.deserialize_int(bytestream, self.SectionsLenBytes)
+        sections_pos = bytestream.tell()
+        addr_table_pos = sections_pos + sections_len
+        name_table_pos = addr_table_pos + addr_table_len*self.IndexOffsetBytes
+        records_pos = name_table_pos + num_projects*self.IndexOffsetBytes
+        return (num_projects, addr_table_len, addr_table_pos, name_table_pos, 
+                records_pos, sections_pos, sections_len)
+    
+    def _seek_first_record(self, bytestream, version:int):
+        if version >= 2:
+            layout = self._indexed_layout(bytestream, version)
+            bytestream.seek(layout[4])
+    
+    def _find_section(self, bytestream, sections_pos:int, sections_len:int, tag:int):
+        '''
+            Returns (data_pos, data_len) for section tag, or None
+        '''
+        pos = sections_pos
+        while pos < sections_pos + sections_len:
+            bytestream.seek(pos)
+            sec_tag = self.deserialize_int(bytestream, self.SectionTagBytes)
+            sec_len = self.deserialize_int(bytestream, self.SectionsLenBytes)
+            pos = bytestream.tell()
+            if sec_tag == tag:
+                return (pos, sec_len)
+            pos += sec_len
+        return None
+    
+    def _load_name_hash(self, bytestream, version:int):
+        # keeps the v3 name hash fingerprints in RAM, with bytestream 
+        # positioned right after the header
+        self._name_fingerprints = None
+        if version < 3:
+            return
+        layout = self._indexed_layout(bytestream, version)
+        section = self._find_section(bytestream, layout[5], layout[6], self.NameHashSectionTag)
+        if section is None:
+            return 
+        bytestream.seek(section[0])
+        num_slots = self.deserialize_int(bytestream, self.IndexOffsetBytes)
+        fingerprints = bytearray(num_slots)
+        bytestream.readinto(fingerprints)
+        self._name_fingerprints = fingerprints
+        self._name_hash_offsets_pos = bytestream.tell()
+    
+    def _name_hash_candidates(self, project_name:str):
+        # slots with a fingerprint matching project_name, in probe order
+        fingerprints = self._name_fingerprints
+        mask = len(fingerprints) - 1
+        if mask < 0:
+            return
+        h = self.name_hash(project_name)
+        fingerprint = self._name_fingerprint(h)
+        slot = h & mask
+        for _i in range(len(fingerprints)):
+            if not fingerprints[slot]:
+                return
+            if fingerprints[slot] == fingerprint:
+                yield slot
+            slot = (slot + 1) & mask
+    
+    def name_may_exist(self, project_name:str) -> bool:
+        '''
+            False if project_name is certainly not on this shuttle, 
+            decided in RAM without any file access when a v3 bin 
+            is in use.  True means maybe.
+        '''
+        if self._name_fingerprints is None:
+            return True
+        for _slot in self._name_hash_candidates(project_name):
+            return True
+        return False
+    
+    def _hashed_design_by_name(self, project_name:str) -> Design:
+        # straight to the record, through the name hash
+        name_skip = Design.SerializeAddressBytes + Design.SerializePayloadSizeBytes
+        with open(self._src_serialized_bin, 'rb') as bytestream:
+            for slot in self._name_hash_candidates(project_name):
+                bytestream.seek(self._name_hash_offsets_pos + slot*self.IndexOffsetBytes)
+                offset = self.deserialize_int(bytestream, self.IndexOffsetBytes)
+                bytestream.seek(offset + name_skip)
+                if Design.deserialize_string(bytestream) == project_name:
+                    return self._design_at_offset(bytestream, offset)
+        return None
+    
+    def _trigram_postings(self, bytestream, table_pos:int, num_trigrams:int, trigram:bytes):
+        # binary search the trigram table, returns the postings' (offset, count)
+        low = 0
+        high = num_trigrams
+        while low < high:
+            mid = (low + high) // 2
+            bytestream.seek(table_pos + mid*self.TrigramEntryBytes)
+            entry = bytestream.read(self.TrigramEntryBytes)
+            entry_trigram = entry[:self.TrigramLen]
+            if entry_trigram == trigram:
+                return (int.from_bytes(entry[self.TrigramLen:self.TrigramLen+self.IndexOffsetBytes], self.ByteOrder),
+                        int.from_bytes(entry[self.TrigramLen+self.IndexOffsetBytes:], self.ByteOrder))
+            if entry_trigram < trigram:
+                low = mid + 1
+            else:
+                high = mid
+        return None
+    
+    def _indexed_find(self, bytestream, version:int, partial_name:str) -> list:
+        '''
+            Uses the v3 search section to only look at names that contain
+            every trigram in partial_name.  Returns None if the index
+            can't help (older file, or search too short), in which case 
+            a full scan is needed.
+        '''
+        if version < 3 or len(partial_name) < self.TrigramLen:
+            return None 
+        layout = self._indexed_layout(bytestream, version)
+        name_table_pos = layout[3]
+        section = self._find_section(bytestream, layout[5], layout[6], self.SearchSectionTag)
+        if section is None:
+            return None 
+        
+        bytestream.seek(section[0])
+        num_trigrams = self.deserialize_int(bytestream, self.IndexOffsetBytes)
+        table_pos = bytestream.tell()
+        
+        needle = partial_name.encode(self.StringEncoding)
+        candidates = None
+        for i in range(len(needle) - self.TrigramLen + 1):
+            postings = self._trigram_postings(bytestream, table_pos, num_trigrams, 
+                                              needle[i:i + self.TrigramLen])
+            if postings is None:
+                return []
+            bytestream.seek(postings[0])
+            raw = bytestream.read(postings[1]*self.IndexCountBytes)
+            ranks = set(map(lambda j: int.from_bytes(raw[j:j+self.IndexCountBytes], self.ByteOrder),
+                            range(0, len(raw), self.IndexCountBytes)))
+            candidates = ranks if candidates is None else candidates & ranks
+            if not len(candidates):
+                return []
+        
+        name_skip = Design.SerializeAddressBytes + Design.SerializePayloadSizeBytes
+        ret_list = []
+        for rank in candidates:
+            bytestream.seek(name_table_pos + rank*self.IndexOffsetBytes)
+            offset = self.deserialize_int(bytestream, self.IndexOffsetBytes)
+            bytestream.seek(offset + name_skip)
+            # trigrams all match, but may not be contiguous
+            if Design.deserialize_string(bytestream).find(partial_name) >= 0:
+                ret_list.append(self._design_at_offset(bytestream, offset))
+        
+        ret_list.sort(key=lambda d: d.project_index)
+        return ret_list
+    
+    def _design_at_offset(self, bytestream, offset:int) -> Design:
+        bytestream.seek(offset)
+        des = Design(self._project_mux)
+        des.deserialize(bytestream)
+        return des
+    
+    def _indexed_design_by_address(self, bytestream, version:int, project_address:int) -> Design:
+        (_num, addr_table_len, addr_table_pos, _nt, _rp, _sp, _sl) = self._indexed_layout(bytestream, version)
+        if project_address < 0 or project_address >= addr_table_len:
+            return None
+        
+        bytestream.seek(addr_table_pos + project_address*self.IndexOffsetBytes)
+        offset = self.deserialize_int(bytestream, self.IndexOffsetBytes)
+        if not offset:
+            return None
+        return self._design_at_offset(bytestream, offset)
+    
+    def _indexed_design_by_name(self, bytestream, version:int, project_name:str) -> Design:
+        (num_projects, _atl, _atp, name_table_pos, _rp, _sp, _sl) = self._indexed_layout(bytestream, version)
+        
+        name_skip = Design.SerializeAddressBytes + Design.SerializePayloadSizeBytes
+        # binary search through the name-sorted offsets
+        low = 0
+        high = num_projects
+        while low < high:
+            mid = (low + high) // 2
+            bytestream.seek(name_table_pos + mid*self.IndexOffsetBytes)
+            offset = self.deserialize_int(bytestream, self.IndexOffsetBytes)
+            bytestream.seek(offset + name_skip)
+            name = Design.deserialize_string(bytestream)
+            if name == project_name:
+                return self._design_at_offset(bytestream, offset)
+            if name < project_name:
+                low = mid + 1
+            else:
+                high = mid
+        
+        return None
+    
     def deserialize_design_by_address(self, fpath:str, project_address:int) -> Design:
         with open(fpath, 'rb') as bytestream:
             version = self.bin_header_valid(bytestream)
             if not version:
                 raise ValueError(f'bad header in {fpath}')
+            if version >= 2:
+                return self._indexed_design_by_address(bytestream, version, project_address)
+            
             addrAndSizeBytes = Design.SerializeAddressBytes + Design.SerializePayloadSizeBytes
             
             while True:
@@ -294,6 +858,14 @@ class DesignIndex(Serializable):
             version = self.bin_header_valid(bytestream)
             if not version:
                 raise ValueError(f'bad header in {fpath}')
+            ret_list = self._indexed_find(bytestream, version, partial_name)
+            if ret_list is not None:
+                for des in ret_list:
+                    self._remember(des)
+                return ret_list
+            
+            bytestream.seek(self.HeaderBytes)
+            self._seek_first_record(bytestream, version)
             ret_list = []
             while True:
                 start_point = bytestream.tell()
@@ -302,6 +874,7 @@ class DesignIndex(Serializable):
                     _addr, size = Design.get_address_and_size_from(bytestream)
                 except ValueError:
                     # empty 
+                    ret_list.sort(key=lambda d: d.project_index)
                     return ret_list
                 payload_point = bytestream.tell()
                 name = Design.deserialize_string(bytestream)
@@ -309,7 +882,7 @@ class DesignIndex(Serializable):
                     bytestream.seek(start_point)
                     des = Design(self._project_mux)
                     des.deserialize(bytestream)
-                    setattr(self, des.name, des)
+                    self._remember(des)
                     ret_list.append(des)
                 else:
                     bytestream.seek(payload_point + size)
@@ -321,6 +894,8 @@ class DesignIndex(Serializable):
             if not version:
                 raise ValueError(f'bad header in {fpath}')
             log.info(f'des_by_name from v{version} file {fpath}')
+            if version >= 2:
+                return self._indexed_design_by_name(bytestream, version, project_name)
             
             while True:
                 
@@ -342,24 +917,82 @@ class DesignIndex(Serializable):
                 bytestream.seek(payload_point + size)
         
         
-    def deserialize(self, bytestream):
+    def deserialize(self, bytestream, version:int=1):
         self._num_projects = 0
+        self._table.clear()
+        if version >= 3:
+            self._load_name_hash(bytestream, version)
+            bytestream.seek(self.HeaderBytes)
+        else:
+            self._name_fingerprints = None
+        if self.strict_memory_saving and version >= 2:
+            # no table to build, the header has the count
+            self._num_projects = self._indexed_layout(bytestream, version)[0]
+            bytestream.close()
+            self._table.done()
+            gc.collect()
+            return
+        
+        self._seek_first_record(bytestream, version)
+        # read the records a chunk at a time, and walk them in 
+        # place rather than doing a few tiny reads per record
+        buf = bytearray(self.DeserializeChunkBytes)
+        view = memoryview(buf)
+        held = 0
         while True:
-            aDesign = Design(self._project_mux)
-            try:
-                aDesign.deserialize(bytestream)
-            except:
+            num_read = bytestream.readinto(view[held:])
+            held += num_read
+            pos = self._deserialize_records(view[:held])
+            if pos is None:
+                # bad record, already reported
+                break
+            # keep any partial record for the next round
+            buf[:held - pos] = buf[pos:held]
+            held -= pos
+            if not num_read:
+                if held:
+                    log.error(f'Truncated shuttle file, keeping the {self._num_projects} projects loaded')
                 # we're done
-                bytestream.close()
-                gc.collect()
-                return
-            if not len(aDesign.name):
+                break
+        
+        bytestream.close()
+        view = None
+        buf = None
+        self._table.done()
+        gc.collect()
+        
+    def _deserialize_records(self, buf) -> int:
+        # walks the complete records in buf, returns where the 
+        # first incomplete one starts, or None if one was bad
+        pos = 0
+        while True:
+            try:
+                rec = Design.unpack_record_from(buf, pos)
+            except Exception as e:
+                log.error(f'Bad shuttle record ({e}), keeping the {self._num_projects} projects loaded')
+                return None
+            if rec is None:
+                return pos
+            (addr, pos, name_start, name_len, danger_level, clock_hz) = rec
+            if not name_len:
                 raise RuntimeError('empty design name')
             self._num_projects += 1
-            if not StrictMemorySaving:
-                nm = aDesign.name 
-                if not hasattr(self, nm):
-                    setattr(self, nm, DesignStub(self, aDesign.count))
+            if not self.strict_memory_saving:
+                self._table.append(addr, buf[name_start:name_start + name_len], danger_level, clock_hz)
+        
+    def __getattr__(self, name:str):
+        # projects are reachable as attributes, tt.shuttle.projects.tt_um_whatever,
+        # but only get a Design object once actually accessed
+        if not name.startswith('_'):
+            des = self._design_named(name)
+            if des is not None:
+                return des
+        raise AttributeError(f'No project "{name}"')
+    
+    def __dir__(self):
+        # so project names still tab-complete, where supported
+        project_names = list(map(lambda idx: self._table.name(idx), range(len(self._table))))
+        return list(super().__dir__()) + project_names
             
     def __len__(self):
         return self._num_projects
@@ -369,6 +1002,32 @@ class DesignIndex(Serializable):
     
     def __repr__(self):
         return f'<DesignIndex {len(self)} projects>'
+
+
+class SweepResult:
+    '''
+        Outcome of running the sweep function on one design,
+        see ProjectMux.sweep()
+    '''
+    def __init__(self, design:Design):
+        self.design = design 
+        self.skipped = False
+        self.result = None 
+        self.error = None 
+        self.enable_us = 0
+        self.run_us = 0
+        
+    @property 
+    def ok(self) -> bool:
+        return not self.skipped and self.error is None
+    
+    def __repr__(self):
+        if self.skipped:
+            return f'<SweepResult {self.design.name} skipped>'
+        if self.error is not None:
+            return f'<SweepResult {self.design.name} FAILED: {self.error}>'
+        return f'<SweepResult {self.design.name} {self.result} ({self.enable_us}us + {self.run_us}us)>'
+    
         
 class ProjectMux:
     '''
@@ -383,6 +1042,12 @@ class ProjectMux:
             to see which project is currently enabled.
     
     '''
+    # duration of each edge sent to the mux select increment
+    MuxEdgeUs = 10
+    # step forward from the current selection, rather than 
+    # resetting the mux and counting up from 0 every time
+    IncrementalSelect = True
+    
     @classmethod 
     def indexfile_for_shuttle(cls, shuttle_name:str):
         return f'/shuttles/{shuttle_name}.json'
@@ -391,9 +1056,16 @@ class ProjectMux:
     def __init__(self, pins:Pins, shuttle_run:str=None):
         self.p = pins 
         self._design_index = None
+        self._pulse_train = None
+        self.mux_edge_us = self.MuxEdgeUs
+        self.incremental_select = self.IncrementalSelect
+        # address the mux select is at, None when unknown
+        self._mux_position = None
         self.enabled = None
         self.design_enabled_callback = None
+        self.sweep_start_callback = None
         self._shuttle_props = None
+        self._design_cache_config = (0, 0, None)
         if shuttle_run is not None:
             log.info(f'shuttle run hardcoded to "{shuttle_run}"')
             self._shuttle_props = HardcodedShuttle(shuttle_run)
@@ -406,6 +1078,7 @@ class ProjectMux:
         time.sleep_ms(10)
         self.p.ncrst(1)
         time.sleep_ms(10)
+        self._mux_position = 0
         self.enabled = None
         
     def disable(self):
@@ -437,15 +1110,45 @@ class ProjectMux:
     def reset_and_clock_mux(self, count:int):
         self.p.safe_bidir() # reset bidirectionals to safe mode
         
-        self.reset()
-        # send the number of pulses required
-        for _c in range(count):
-            self.p.cinc(1)
-            time.sleep_ms(1)
-            self.p.cinc(0)
-            time.sleep_ms(1)
+        if self.incremental_select and self._mux_position is not None \
+            and count >= self._mux_position:
+            # just move forward from where we are
+            self.p.cena(0)
+            self.send_increments(count - self._mux_position)
+        else:
+            self.reset()
+            # send the number of pulses required
+            self.send_increments(count)
         
         self.p.cena(1)
+    
+    @property 
+    def mux_position(self) -> int:
+        '''
+            Address the mux select is currently at, or None if unknown
+        '''
+        return self._mux_position
+    
+    def forget_mux_position(self):
+        '''
+            Call if the ctrl pins were played with behind our back, 
+            so the next selection starts from a reset.
+        '''
+        self._mux_position = None
+    
+    def send_increments(self, count:int):
+        '''
+            Clocks the mux select forward count times, as one 
+            burst of mux_edge_us edges generated by PIO.
+        '''
+        pin = self.p.pin_cinc
+        if self._pulse_train is None:
+            # built once, the state machine is kept across selections
+            self._pulse_train = platform.PulseTrain(pin, self.mux_edge_us)
+        self._pulse_train.edge_us = self.mux_edge_us
+        self._pulse_train.send(count)
+        if self._mux_position is not None:
+            self._mux_position += count
         
     @property 
     def pins(self) -> Pins:
@@ -480,10 +1183,24 @@ class ProjectMux:
             self.shuttle_index_file = self.indexfile_for_shuttle(self.run)
             log.info(f'Loading shuttle file {self.shuttle_index_file}')
                 
-            self._design_index = DesignIndex(self, src_JSON_file=self.shuttle_index_file)
+            (max_designs, max_bytes, strict) = self._design_cache_config
+            self._design_index = DesignIndex(self, src_JSON_file=self.shuttle_index_file, 
+                                             max_cached_designs=max_designs, 
+                                             max_cached_bytes=max_bytes, 
+                                             strict_memory_saving=strict)
 
         return self._design_index
     
+    def configure_design_cache(self, max_designs:int=0, max_bytes:int=0, strict_memory_saving:bool=None):
+        '''
+            Limits on loaded Design objects, see DesignIndex.configure_cache.
+            Best done before the projects are first accessed, as 
+            strict_memory_saving also affects how the index is loaded.
+        '''
+        self._design_cache_config = (max_designs, max_bytes, strict_memory_saving)
+        if self._design_index is not None:
+            self._design_index.configure_cache(max_designs, max_bytes, strict_memory_saving)
+    
     def has(self, project_name:str):
         return self.projects.is_available(project_name)
     
@@ -494,11 +1211,89 @@ class ProjectMux:
     def find(self, search:str) -> list:
         return self.projects.find(search)
     
+    def sweep(self, projects:list, fn, max_allowable_danger:int=DangerLevel.SAFE, 
+              apply_config:bool=True, stop_on_error:bool=False) -> list:
+        '''
+            Enables each of projects in turn, and calls fn(design) on it.
+            
+            @param projects: designs, names or addresses. None for the whole shuttle.
+            @param fn: called with each enabled design, whatever it returns 
+                       ends up in the result
+            @param max_allowable_danger: designs over this are skipped, up front
+            @param apply_config: whether design_enabled_callback (the user config)
+                                 gets applied to each design
+            @param stop_on_error: otherwise, exceptions raised by fn are recorded
+                                  and the sweep carries on
+            @return: a SweepResult per design, in the order they were run
+            
+            Designs are run in mux address order, so each selection is a 
+            short step forward from the last, e.g.
+            
+                tt.shuttle.sweep(tt.shuttle.find('counter'), 
+                                 lambda d: tt.uo_out.value)
+        '''
+        if projects is None:
+            projects = self.projects.all
+        
+        designs = []
+        for p in projects:
+            if isinstance(p, int) or isinstance(p, str):
+                p = self.get(p)
+            designs.append(p)
+        designs.sort(key=lambda d: d.count)
+        
+        results = []
+        to_run = []
+        for des in designs:
+            res = SweepResult(des)
+            if des.danger_level > max_allowable_danger:
+                log.warn(f'Sweep skipping {des.name}, danger level {des.danger_level_str}')
+                res.skipped = True
+            else:
+                to_run.append(des)
+            results.append(res)
+        
+        enabled_callback = self.design_enabled_callback
+        if not apply_config:
+            self.design_enabled_callback = None
+        elif self.sweep_start_callback is not None:
+            # chance to get whatever's needed for all of them in one go
+            self.sweep_start_callback(to_run)
+            
+        try:
+            for res in results:
+                if res.skipped:
+                    continue 
+                des = res.design
+                start = time.ticks_us()
+                if not self.enable(des, force=True):
+                    res.error = 'enable failed'
+                    res.enable_us = time.ticks_diff(time.ticks_us(), start)
+                    if stop_on_error:
+                        break 
+                    continue
+                
+                started_fn = time.ticks_us()
+                res.enable_us = time.ticks_diff(started_fn, start)
+                try:
+                    res.result = fn(des)
+                except Exception as e:
+                    res.error = e
+                    if stop_on_error:
+                        raise e
+                finally:
+                    res.run_us = time.ticks_diff(time.ticks_us(), started_fn)
+                log.info(f'Sweep {res}')
+        finally:
+            self.design_enabled_callback = enabled_callback
+        
+        return results
+    
     def __getattr__(self, name):
         if hasattr(self, 'projects'):
             if self.projects.is_available(name) or hasattr(self.projects, name):
                 return getattr(self.projects, name)
-            if StrictMemorySaving:
+            if self.projects.strict_memory_saving and self.projects.name_may_exist(name):
                 return self.projects.load_project(name)
         raise AttributeError(f"What is '{name}'?")
     
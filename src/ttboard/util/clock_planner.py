@@ -0,0 +1,126 @@
+'''
+Created on Oct 17, 2026
+
+Picks the RP system clock to use when PWMing the project clock,
+such that the (even) PWM divisor gets as close as possible to the
+target frequency.
+
+    sys_clk = ClockPlanner.best_system_clock(10_000_000)
+
+Candidate system clocks are scanned from the top down, 1MHz apart
+(2MHz above 136MHz), the first to divide exactly wins, otherwise
+the one with the smallest fractional divisor error.  All integer
+math, and results are cached per target.
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2026 Pat Deegan, https://psychogenic.com
+'''
+
+import ttboard.log as logging
+log = logging.getLogger(__name__)
+
+class ClockPlanner:
+    MinSystemClockHz = 48_000_000
+    MaxDivisor = 2**24 - 1
+    FineStepsBelowHz = 136_000_000
+    CacheSize = 32
+    
+    _cache = dict()
+    
+    @classmethod
+    def divisor(cls, sys_clk:int, freq:int) -> int:
+        '''
+            Even PWM divisor of sys_clk that lands closest to freq
+        '''
+        div = max((sys_clk // (2 * freq)) * 2, 2)
+        # rounded results, with div and the next even divisor up
+        err_div = abs((2 * sys_clk + div) // (2 * div) - freq)
+        err_next = abs((2 * sys_clk + div + 2) // (2 * (div + 2)) - freq)
+        if err_div > err_next:
+            div += 2
+        return div
+    
+    @classmethod
+    def divides_exactly(cls, sys_clk:int, freq:int) -> bool:
+        return freq == sys_clk // cls.divisor(sys_clk, freq)
+    
+    @classmethod
+    def check_range(cls, freq:int, max_sys_clk:int):
+        if freq > max_sys_clk // 2:
+            raise ValueError("Requested frequency too high")
+        if freq <= cls.MinSystemClockHz // cls.MaxDivisor:
+            raise ValueError("Requested frequency too low")
+    
+    @classmethod
+    def best_system_clock(cls, freq:int, max_sys_clk:int=133_000_000, current_sys_clk:int=None) -> int:
+        '''
+            System clock to use to PWM freq.
+            If current_sys_clk is passed, and is in the allowed
+            range and already divides down to freq exactly, it
+            is returned as is, to avoid needlessly changing clocks.
+            @raise ValueError: if freq is out of range
+        '''
+        freq = int(freq)
+        cls.check_range(freq, max_sys_clk)
+        if current_sys_clk is not None \
+            and cls.MinSystemClockHz <= current_sys_clk <= max_sys_clk \
+            and 10 * current_sys_clk >= 19 * freq \
+            and cls.divides_exactly(current_sys_clk, freq):
+            return current_sys_clk
+        
+        key = (freq, max_sys_clk)
+        if key in cls._cache:
+            return cls._cache[key]
+        
+        sys_clk = cls._scan(freq, max_sys_clk)
+        if len(cls._cache) >= cls.CacheSize:
+            cls._cache.clear()
+        cls._cache[key] = sys_clk
+        return sys_clk
+    
+    @classmethod
+    def _scan(cls, freq:int, max_sys_clk:int) -> int:
+        sys_clk = min(max_sys_clk, freq * cls.MaxDivisor)
+        if sys_clk > cls.FineStepsBelowHz:
+            sys_clk = (sys_clk // 2_000_000) * 2_000_000
+        else:
+            sys_clk = (sys_clk // 1_000_000) * 1_000_000
+        
+        best_clk = 0
+        best_div = 0
+        best_err = None
+        # clk >= 1.9*freq, without floats
+        min_clk = max(cls.MinSystemClockHz, (19 * freq + 9) // 10)
+        fine_below = cls.FineStepsBelowHz
+        two_freq = 2 * freq
+        while sys_clk >= min_clk:
+            # cls.divisor(), inline
+            div = (sys_clk // two_freq) * 2
+            if div < 2:
+                div = 2
+            if abs((2 * sys_clk + div) // (2 * div) - freq) > \
+                abs((2 * sys_clk + div + 2) // (2 * div + 4) - freq):
+                div += 2
+            if freq == sys_clk // div:
+                return sys_clk
+            
+            # fractional divisor error is err/freq, same freq throughout
+            err = abs(sys_clk - freq * div)
+            if best_err is None or err < best_err:
+                best_err = err
+                best_clk = sys_clk
+                best_div = div
+            
+            if sys_clk - 1_000_000 > fine_below:
+                sys_clk -= 2_000_000
+            else:
+                sys_clk -= 1_000_000
+    
+        if best_div and 256 * best_err >= freq:
+            log.info(f"freq_jitter_free={best_clk // best_div}")
+        
+        return best_clk
+    
+    @classmethod
+    def clear_cache(cls):
+        cls._cache.clear()
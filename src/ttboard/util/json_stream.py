@@ -0,0 +1,186 @@
+'''
+Created on Oct 17, 2026
+
+Incremental reading of large JSON files, like the shuttle
+indices, without ever holding the whole thing in memory.
+
+    with open('/shuttles/tt06.json') as fh:
+        for project in array_items(fh, 'projects'):
+            print(project['macro'])
+
+Only one item of the array is ever decoded at a time, so peak
+memory is bounded by the largest item plus a read chunk.
+
+@author: Pat Deegan
+@copyright: Copyright (C) 2026 Pat Deegan, https://psychogenic.com
+'''
+import json
+
+DefaultChunkSize = 512
+Whitespace = ' \t\r\n'
+
+class _ChunkReader:
+    '''
+        Holds the unconsumed tail of what was read from the file,
+        refilling it as required.
+    '''
+    def __init__(self, fh, chunk_size:int):
+        self.fh = fh
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.eof = False
+
+    def fill(self):
+        if self.eof:
+            return False
+        chunk = self.fh.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf += chunk
+        return True
+
+    def consume(self, upto:int):
+        self.buf = self.buf[upto:]
+
+    def skip_whitespace(self):
+        # returns next meaningful character, consumed up to it
+        while True:
+            i = 0
+            while i < len(self.buf) and self.buf[i] in Whitespace:
+                i += 1
+            self.consume(i)
+            if len(self.buf):
+                return self.buf[0]
+            if not self.fill():
+                raise ValueError('unexpected end of JSON')
+
+    def expect(self, c:str):
+        if self.skip_whitespace() != c:
+            raise ValueError(f'expected "{c}" in JSON, got "{self.buf[0]}"')
+        self.consume(1)
+
+    def find_key(self, key:str):
+        # walks the keys of the top level object, leaving buf on the ':'
+        # following key.  Values of other keys, nested objects and 
+        # strings, are skipped over whole, so never mistaken for it.
+        self.expect('{')
+        while True:
+            c = self.skip_whitespace()
+            if c == ',':
+                self.consume(1)
+                continue
+            if c == '}':
+                raise ValueError(f'no "{key}" in JSON')
+            if c != '"':
+                raise ValueError(f'expected a key in JSON, got "{c}"')
+            if json.loads(self.string_text()) == key:
+                return
+            self.expect(':')
+            self.skip_value()
+            
+    def skip_value(self):
+        c = self.skip_whitespace()
+        if c == '"':
+            self.string_text()
+        elif c in '{[':
+            self.container_text(keep=False)
+        else:
+            # number, true, false or null: up to whatever follows
+            i = 0
+            while True:
+                while i < len(self.buf) and self.buf[i] not in ',}]' and self.buf[i] not in Whitespace:
+                    i += 1
+                self.consume(i)
+                if len(self.buf):
+                    return
+                i = 0
+                if not self.fill():
+                    raise ValueError('unexpected end of JSON')
+
+    def _string_end(self, start:int) -> int:
+        # index just past the closing quote of the string
+        # starting at start, or -1 if not fully read yet
+        i = start + 1
+        while True:
+            q = self.buf.find('"', i)
+            if q < 0:
+                return -1
+            escapes = 0
+            j = q - 1
+            while self.buf[j] == '\\':
+                escapes += 1
+                j -= 1
+            if escapes % 2 == 0:
+                return q + 1
+            i = q + 1
+
+    def string_text(self) -> str:
+        # with buf starting on a '"', returns the whole string, quotes included
+        while True:
+            end = self._string_end(0)
+            if end >= 0:
+                text = self.buf[:end]
+                self.consume(end)
+                return text
+            if not self.fill():
+                raise ValueError('unexpected end of JSON string')
+
+    def container_text(self, keep:bool=True) -> str:
+        # with buf starting on a '{' or '[', returns the text of the 
+        # whole object or array, or just consumes it if not keep
+        depth = 0
+        i = 0
+        while True:
+            pos = -1
+            for c in '{}[]"':
+                p = self.buf.find(c, i)
+                if p >= 0 and (pos < 0 or p < pos):
+                    pos = p
+            if pos < 0:
+                i = len(self.buf)
+            else:
+                c = self.buf[pos]
+                if c == '"':
+                    end = self._string_end(pos)
+                    if end >= 0:
+                        i = end
+                        continue
+                    # string isn't complete, come back to it
+                    i = pos
+                else:
+                    depth += 1 if c in '{[' else -1
+                    i = pos + 1
+                    if not depth:
+                        text = self.buf[:i] if keep else None
+                        self.consume(i)
+                        return text
+                    continue
+            if not keep:
+                # don't hang on to what's being skipped
+                self.consume(i)
+                i = 0
+            if not self.fill():
+                raise ValueError('unexpected end of JSON value')
+
+
+def array_items(fh, key:str, chunk_size:int=DefaultChunkSize):
+    '''
+        Generator yielding each item (object) of the array named key,
+        in the top level object of the JSON file fh, one at a time.
+        Stop iterating whenever you like, nothing more gets read.
+    '''
+    reader = _ChunkReader(fh, chunk_size)
+    reader.find_key(key)
+    reader.expect(':')
+    reader.expect('[')
+    while True:
+        c = reader.skip_whitespace()
+        if c == ']':
+            return
+        if c == ',':
+            reader.consume(1)
+            continue
+        if c != '{':
+            raise ValueError(f'only objects supported in "{key}" array, got "{c}"')
+        yield json.loads(reader.container_text())
@@ -7,6 +7,9 @@ Created on Nov 8, 2025
 import os.path 
 isfile = os.path.isfile
 
+# set_RP_system_clock() pretends to change this
+RP2040SystemClockDefaultHz = 125000000
+
 class PIOClock:
     def __init__(self, pin):
         self.freq = 0
@@ -19,6 +22,52 @@ class PIOClock:
     def stop(self):
         self.freq = 0
         print("PIO clock stop")
+class PulseTrain:
+    '''
+        Desktop stand-in for the PIO pulse train, only 
+        keeps count of the pulses it was asked for.
+    '''
+    def __init__(self, pin, edge_us:float=10):
+        self.pin = pin
+        self.edge_us = edge_us
+        self.pulses_sent = 0
+        self.bursts = []
+        
+    def send(self, count:int):
+        if count <= 0:
+            return 
+        self.pulses_sent += count 
+        self.bursts.append(count)
+        self.pin.value(0)
+        
+class ClockBurst:
+    '''
+        Desktop stand-in for the PIO clock burst, only 
+        keeps count of the cycles it was asked for.
+    '''
+    def __init__(self, pin):
+        self.pin = pin
+        self.cycles_sent = 0
+        self.bursts = []
+        
+    @classmethod 
+    def max_freq(cls) -> int:
+        return RP2040SystemClockDefaultHz // 2
+        
+    def start(self, count:int, freq_hz:int=None):
+        if count <= 0:
+            return 
+        self.cycles_sent += count 
+        self.bursts.append((count, freq_hz))
+        self.pin.value(0)
+        
+    @property 
+    def done(self) -> bool:
+        return True 
+    
+    def wait(self):
+        return
+        
 def pin_as_input(gpio_index:int, pull:int=None):
     from ttboard.pins.upython import Pin
     return Pin(gpio_index, Pin.IN, pull=pull)
@@ -35,6 +84,14 @@ def write_ui_in_byte(val):
     print(f'Sim write_input_byte {val}')
     _inbyte = val
 
+def write_ui_in_bit(bit:int, val):
+    global _inbyte
+    print(f'Sim write_ui_in_bit {bit} {val}')
+    if val:
+        _inbyte |= (1 << bit)
+    else:
+        _inbyte &= ~(1 << bit)
+
 def read_ui_in_byte():
     print('Sim read_output_byte')
     return _inbyte
@@ -48,10 +105,26 @@ def write_uio_byte(val):
 
     
     
+def write_uio_bit(bit:int, val):
+    global _uio_byte
+    print(f'Sim write_uio_bit {bit} {val}')
+    if val:
+        _uio_byte |= (1 << bit)
+    else:
+        _uio_byte &= ~(1 << bit)
+
 def read_uio_byte():
     print('Sim read_output_byte')
     return _uio_byte
 
+def write_ports(ui_in=None, uio_in=None):
+    global _inbyte, _uio_byte
+    print(f'Sim write_ports {ui_in} {uio_in}')
+    if ui_in is not None:
+        _inbyte = ui_in
+    if uio_in is not None:
+        _uio_byte = uio_in
+
 _outbyte = 0
 def write_uo_out_byte(val):
     global _outbyte 
@@ -75,6 +148,12 @@ def write_uio_outputenable(val):
     print(f'Sim write_bidir_outputenable {val}')
     _uio_oe_pico = val
 
+def sample_all():
+    return _inbyte | (_outbyte << 8) | (_uio_byte << 16)
+
+def unpack_sample(sample:int):
+    return (sample & 0xff, (sample >> 8) & 0xff, (sample >> 16) & 0xff)
+
 _clk_pin = 0
 def read_clock():
     return _clk_pin
@@ -82,5 +161,48 @@ def read_clock():
 def write_clock(val):
     global _clk_pin
     _clk_pin = val
-        
-    
\ No newline at end of file
+
+# (ui_in, uio_in) for every step played, uio_in None if not given
+PlayedStimulus = []
+def play_stimulus(ui_in_buf, uio_in_buf=None):
+    global _inbyte, _uio_byte
+    for i in range(len(ui_in_buf)):
+        _inbyte = ui_in_buf[i]
+        uio = None
+        if uio_in_buf is not None:
+            uio = uio_in_buf[i]
+            _uio_byte = uio
+        PlayedStimulus.append((_inbyte, uio))
+    return len(ui_in_buf)
+
+def compare_samples(expected, mask, start:int, samples, n:int):
+    first = -1
+    count = 0
+    for i in range(n):
+        m = 0xff if mask is None else mask[start + i]
+        if (expected[start + i] ^ samples[i]) & m:
+            if first < 0:
+                first = i
+            count += 1
+    return (first, count)
+
+def capture_clock_range():
+    # same limits as the RP2350 PIO capture
+    return ((RP2040SystemClockDefaultHz // 65536 + 1 + 3) // 4, RP2040SystemClockDefaultHz // 4)
+
+# number of cycles clocked through capture_outputs()
+CapturedCycles = 0
+def capture_outputs(buf, n_cycles:int, ports:tuple, sample_on_rising:bool, clock_hz:int):
+    global CapturedCycles
+    (min_hz, max_hz) = capture_clock_range()
+    if clock_hz < min_hz or clock_hz > max_hz:
+        raise ValueError(f'Capture clock must be within {min_hz}-{max_hz}Hz')
+    values = {'uo_out': _outbyte, 'uio_out': _uio_byte}
+    pos = 0
+    for _i in range(n_cycles):
+        for p in ports:
+            buf[pos] = values[p]
+            pos += 1
+    CapturedCycles += n_cycles
+    # as if through PIO
+    return True
@@ -67,6 +67,125 @@ class PIOClock:
         self._current_pio = None
         self.pin.init(machine.Pin.IN)
 
+@rp2.asm_pio(set_init=rp2.PIO.OUT_LOW)
+def _pio_pulse_train():
+    # pulse count - 1 comes in through the FIFO
+    pull(block)
+    mov(x, osr)
+    label("pulse")
+    set(pins, 1) [1]
+    set(pins, 0)
+    jmp(x_dec, "pulse")
+    # let the caller know we're done
+    push(block)
+
+class PulseTrain:
+    '''
+        Sends a burst of pulses out of a pin, from a PIO state machine,
+        used to step the project mux select.
+        Every edge lasts edge_us: each phase is 2 state machine 
+        cycles, so that sets the state machine frequency.
+    '''
+    StateMachineID = 4
+    def __init__(self, pin, edge_us:float=10):
+        self.pin = pin
+        self.edge_us = edge_us
+        self.pulses_sent = 0
+        self._sm = None
+        self._sm_edge_us = None
+        
+    def send(self, count:int):
+        if count <= 0:
+            return 
+        sm = self._sm
+        if sm is None or self._sm_edge_us != self.edge_us:
+            # set up once, again only if the timing changes
+            sm = rp2.StateMachine(self.StateMachineID, _pio_pulse_train,
+                                  freq=int(2_000_000/self.edge_us),
+                                  set_base=self.pin)
+            self._sm = sm
+            self._sm_edge_us = self.edge_us
+        else:
+            # pin was handed back to GPIO after the last burst, 
+            # give it back to PIO1 (where state machine 4 lives)
+            self.pin.init(machine.Pin.ALT, alt=machine.Pin.ALT_PIO1)
+        sm.active(1)
+        sm.put(count - 1)
+        sm.get() # blocks until the last pulse is out
+        sm.active(0)
+        # hand the pin back to regular GPIO
+        self.pin.init(machine.Pin.OUT, value=0)
+        self.pulses_sent += count
+
+@rp2.asm_pio(sideset_init=rp2.PIO.OUT_LOW)
+def _pio_clock_burst():
+    # cycle count - 1 comes in through the FIFO, 
+    # one state machine cycle high, one low
+    pull(block)         .side(0)
+    mov(x, osr)         .side(0)
+    label("cycle")
+    nop()               .side(1)
+    jmp(x_dec, "cycle") .side(0)
+    # let the caller know we're done
+    push(block)         .side(0)
+
+class ClockBurst:
+    '''
+        Clocks a pin an exact number of times, from a PIO state 
+        machine running at twice the clock frequency (so at most 
+        half the system clock).
+        
+        start() returns immediately, check done or wait().
+    '''
+    StateMachineID = 1
+    def __init__(self, pin):
+        self.pin = pin
+        self.cycles_sent = 0
+        self._sm = None
+        self._pending = 0
+        
+    @classmethod 
+    def max_freq(cls) -> int:
+        return machine.freq() // 2
+        
+    def start(self, count:int, freq_hz:int=None):
+        self.wait()
+        if count <= 0:
+            return
+        sys_clk = machine.freq()
+        sm_freq = sys_clk if freq_hz is None else int(2*freq_hz)
+        if sm_freq > sys_clk or sm_freq < (sys_clk // 65536) + 1:
+            raise ValueError(f'Clock burst frequency must be within {sys_clk//131072 + 1}-{sys_clk//2}Hz')
+        
+        self._sm = rp2.StateMachine(self.StateMachineID, _pio_clock_burst,
+                                    freq=sm_freq, sideset_base=self.pin)
+        self._pending = count
+        self._sm.active(1)
+        self._sm.put(count - 1)
+        
+    @property 
+    def done(self) -> bool:
+        if self._sm is None:
+            return True 
+        if not self._sm.rx_fifo():
+            return False 
+        self._finish()
+        return True 
+    
+    def wait(self):
+        if self._sm is not None:
+            self._finish()
+        
+    def _finish(self):
+        self._sm.get() # blocks until the last cycle is out
+        self._sm.active(0)
+        self._sm = None
+        # hand the pin back to regular GPIO
+        self.pin.init(machine.Pin.OUT, value=0)
+        self.cycles_sent += self._pending
+        self._pending = 0
+        
+
 def isfile(file_path:str):
     try:
         f = open(file_path, 'r')
@@ -80,3 +199,27 @@ def get_RP_system_clock():
 def set_RP_system_clock(freqHz:int):
     machine.freq(int(freqHz))
 
+
+# plain here, as this is shared with the (frozen) RP2350 build,
+# rp2040.py has a native version
+def compare_samples(expected, mask, start:int, samples, n:int):
+    '''
+        Compares samples[0:n] against expected[start:start+n], 
+        only on the bits set in mask[start:start+n], if passed.
+        @return: (index in samples of first mismatch or -1, number of mismatches)
+    '''
+    first = -1
+    count = 0
+    if mask is None:
+        for i in range(n):
+            if expected[start + i] != samples[i]:
+                if first < 0:
+                    first = i
+                count += 1
+    else:
+        for i in range(n):
+            if (expected[start + i] ^ samples[i]) & mask[start + i]:
+                if first < 0:
+                    first = i
+                count += 1
+    return (first, count)
@@ -63,10 +63,23 @@ def write_ui_in_byte(val):
     # writing to 0xd000001c will flip any GPIO where a 1 is found
     machine.mem32[0xd000001c] = val
     
+# single bit masks for each ui_in and uio bit's GPIO
+_ui_in_bit_masks = tuple(map(lambda g: 1 << g, [9, 10, 11, 12, 17, 18, 19, 20]))
+_uio_bit_masks = tuple(map(lambda i: 1 << (21 + i), range(8)))
+
+@micropython.native
+def write_ui_in_bit(bit:int, val):
+    # GPIO_OUT_SET or GPIO_OUT_CLR, nothing to read back
+    if val:
+        machine.mem32[0xd0000014] = _ui_in_bit_masks[bit]
+    else:
+        machine.mem32[0xd0000018] = _ui_in_bit_masks[bit]
+    
 @micropython.native
 def read_ui_in_byte():
     # just read the high and low nibbles from GPIO and combine into a byte
-    return ( (machine.mem32[0xd0000004] & (0xf << 17)) >> (17-4)) | ((machine.mem32[0xd0000004] & (0xf << 9)) >> 9)
+    gpio_in = machine.mem32[0xd0000004]
+    return ( (gpio_in & (0xf << 17)) >> (17-4)) | ((gpio_in & (0xf << 9)) >> 9)
 
 
 @micropython.native
@@ -84,6 +97,29 @@ def write_uio_byte(val):
     machine.mem32[0xd000001c] = val
     
     
+@micropython.native
+def write_uio_bit(bit:int, val):
+    if val:
+        machine.mem32[0xd0000014] = _uio_bit_masks[bit]
+    else:
+        machine.mem32[0xd0000018] = _uio_bit_masks[bit]
+    
+@micropython.native
+def write_ports(ui_in=None, uio_in=None):
+    # ui_in and uio_in together, in a single XOR so 
+    # all the pins change at the same instant
+    # mapping as in write_ui_in_byte and write_uio_byte
+    val = 0
+    mask = 0
+    if ui_in is not None:
+        val = ((ui_in & 0xF) << 9) | ((ui_in & 0xF0) << 17-4)
+        mask = 0x1E1E00
+    if uio_in is not None:
+        val |= (uio_in & 0xff) << 21
+        mask |= 0x1FE00000
+    machine.mem32[0xd000001c] = (machine.mem32[0xd0000010] ^ val) & mask
+    
+    
 @micropython.native
 def read_uio_byte():
     return (machine.mem32[0xd0000004] & (0xff << 21)) >> 21
@@ -97,9 +133,11 @@ def read_uio_outputenable():
 @micropython.native
 def write_uio_outputenable(val):
     # dump_portset('uio_oe', val)
-    # GPIO_OE register, clearing bidir pins and setting any enabled
-    val = (val << 21)
-    machine.mem32[0xd0000020] = (machine.mem32[0xd0000020] & ((1 << 21) - 1)) | val
+    # GPIO_OE_SET for the enabled bidir pins, GPIO_OE_CLR for the 
+    # rest: no read-modify-write, and nothing else gets touched
+    val = (val & 0xff) << 21
+    machine.mem32[0xd0000028] = 0x1FE00000 & ~val # OE_CLR
+    machine.mem32[0xd0000024] = val # OE_SET
     
 @micropython.native
 def write_uo_out_byte(val):
@@ -132,8 +170,22 @@ def read_uo_out_byte():
     #    val =  ((all_io & (0xf << 13)) >> (13 - 4)) | ((all_io & (0xf << 5)) >> 5)
     #else:
     # just read the high and low nibbles from GPIO and combine into a byte
-    return ( (machine.mem32[0xd0000004] & (0xf << 13)) >> (13-4)) | ((machine.mem32[0xd0000004] & (0xf << 5)) >> 5)
+    gpio_in = machine.mem32[0xd0000004]
+    return ( (gpio_in & (0xf << 13)) >> (13-4)) | ((gpio_in & (0xf << 5)) >> 5)
+
 
+@micropython.native
+def sample_all():
+    # all GPIO fit in the one GPIO_IN register here
+    return machine.mem32[0xd0000004]
+
+def unpack_sample(sample:int):
+    '''
+        (ui_in, uo_out, uio) from a sample_all() word
+    '''
+    ui_in = ((sample & (0xf << 17)) >> (17-4)) | ((sample & (0xf << 9)) >> 9)
+    (uo_out, uio) = _read_uo_out_and_uio(sample)
+    return (ui_in, uo_out, uio)
 
 @micropython.native
 def read_clock():
@@ -150,3 +202,83 @@ def write_clock(val):
         machine.mem32[0xd0000018] = 1 # clear bit 0
     
     
+
+
+@micropython.native
+def play_stimulus(ui_in_buf, uio_in_buf=None):
+    # one clock per entry: set inputs, clock high, clock low
+    # mapping as in write_ui_in_byte and write_uio_byte
+    num_entries = len(ui_in_buf)
+    if uio_in_buf is None:
+        for i in range(num_entries):
+            val = ui_in_buf[i]
+            val = ((val & 0xF) << 9) | ((val & 0xF0) << 17-4)
+            machine.mem32[0xd000001c] = (machine.mem32[0xd0000010] ^ val) & 0x1E1E00
+            machine.mem32[0xd0000014] = 1 # clock high
+            machine.mem32[0xd0000018] = 1 # clock low
+        return num_entries
+    
+    for i in range(num_entries):
+        val = ui_in_buf[i]
+        val = ((val & 0xF) << 9) | ((val & 0xF0) << 17-4) | (uio_in_buf[i] << 21)
+        # both ports in one XOR
+        machine.mem32[0xd000001c] = (machine.mem32[0xd0000010] ^ val) & 0x1FFE1E00
+        machine.mem32[0xd0000014] = 1 # clock high
+        machine.mem32[0xd0000018] = 1 # clock low
+    return num_entries
+
+
+@micropython.native
+def _read_uo_out_and_uio(gpio_in:int):
+    uo_out = ((gpio_in & (0xf << 13)) >> (13-4)) | ((gpio_in & (0xf << 5)) >> 5)
+    return (uo_out, (gpio_in & (0xff << 21)) >> 21)
+
+@micropython.native
+def compare_samples(expected, mask, start:int, samples, n:int):
+    # as rp2.compare_samples, native
+    first = -1
+    count = 0
+    if mask is None:
+        for i in range(n):
+            if expected[start + i] != samples[i]:
+                if first < 0:
+                    first = i
+                count += 1
+    else:
+        for i in range(n):
+            if (expected[start + i] ^ samples[i]) & mask[start + i]:
+                if first < 0:
+                    first = i
+                count += 1
+    return (first, count)
+
+def capture_clock_range():
+    # capture_outputs() ignores clock_hz here
+    return None
+
+def capture_outputs(buf, n_cycles:int, ports:tuple, sample_on_rising:bool, clock_hz:int):
+    '''
+        Clocks the project n_cycles times, filling buf with a byte 
+        per port in ports, per cycle.
+        uo_out isn't on contiguous GPIO here, so this is a 
+        register loop rather than PIO, and clock_hz is ignored.
+        @return: True if PIO/DMA was used
+    '''
+    num_ports = len(ports)
+    uo_idx = ports.index('uo_out') if 'uo_out' in ports else -1
+    uio_idx = ports.index('uio_out') if 'uio_out' in ports else -1
+    pos = 0
+    for _i in range(n_cycles):
+        if not sample_on_rising:
+            machine.mem32[0xd0000014] = 1 # clock high
+        # single read of GPIO_IN, for a coherent sample
+        (uo_out, uio) = _read_uo_out_and_uio(machine.mem32[0xd0000004])
+        if uo_idx >= 0:
+            buf[pos + uo_idx] = uo_out
+        if uio_idx >= 0:
+            buf[pos + uio_idx] = uio
+        pos += num_ports
+        if sample_on_rising:
+            machine.mem32[0xd0000014] = 1 # clock high
+        machine.mem32[0xd0000018] = 1 # clock low
+    return False
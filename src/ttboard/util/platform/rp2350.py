@@ -73,6 +73,14 @@ def write_ui_in_byte(val):
     # writing to GPIO_OUT_XOR will flip any GPIO where a 1 is found
     machine.mem32[0xd0000028] = changedVal
     
+###@micropython.native
+def write_ui_in_bit(bit:int, val):
+    # GPIO_OUT_SET or GPIO_OUT_CLR, nothing to read back
+    if val:
+        machine.mem32[0xd0000018] = 1 << (17 + bit)
+    else:
+        machine.mem32[0xd0000020] = 1 << (17 + bit)
+    
 ###@micropython.native
 def read_ui_in_byte():
     return ( (machine.mem32[0xd0000004] & (0xff << 17)) >> 17)
@@ -96,6 +104,38 @@ def write_uio_byte(val):
     machine.mem32[0xd000002C] = valH
     
     
+###@micropython.native
+def write_uio_bit(bit:int, val):
+    # bits 0-6 on GPIO25-31, bit 7 is GPIO32, in the HI registers
+    if bit < 7:
+        mask = 1 << (25 + bit)
+        if val:
+            machine.mem32[0xd0000018] = mask
+        else:
+            machine.mem32[0xd0000020] = mask
+    elif val:
+        machine.mem32[0xd000001C] = 1
+    else:
+        machine.mem32[0xd0000024] = 1
+    
+###@micropython.native
+def write_ports(ui_in=None, uio_in=None):
+    # ui_in and uio_in together: one combined XOR for the low 
+    # bank (ui_in on 17-24, uio bits 0-6 on 25-31) so they 
+    # change at the same instant, and uio bit 7 on GPIO32
+    val = 0
+    mask = 0
+    if ui_in is not None:
+        val = (ui_in & 0xff) << 17
+        mask = (0xff << 17)
+    if uio_in is not None:
+        val |= (uio_in & 0x7f) << 25
+        mask |= (0x7f << 25)
+        machine.mem32[0xd000002C] = (machine.mem32[0xd0000014] ^ ((uio_in & 0x80) >> 7)) & 1
+    if mask:
+        machine.mem32[0xd0000028] = (machine.mem32[0xd0000010] ^ val) & mask
+    
+    
 ###@micropython.native
 def read_uio_byte():
     return ((machine.mem32[0xd0000008] & (0x80 >> 7)) << 7) | ((machine.mem32[0xd0000004] & (0x7f << 25)) >> 25)
@@ -110,13 +150,14 @@ def read_uio_outputenable():
 ###@micropython.native
 def write_uio_outputenable(val):
     # dump_portset('uio_oe', val)
-    # GPIO_OE register, clearing bidir pins and setting any enabled
+    # GPIO_OE_SET for the enabled bidir pins, GPIO_OE_CLR for the 
+    # rest: no read-modify-write, and nothing else gets touched
     valL = (val & 0x7f) << 25
     valH = (val & 0x80) >> 7
-    
-    # TODO: CHECK
-    machine.mem32[0xd0000030] = (machine.mem32[0xd0000030] & 0x01ffffff) | valL
-    machine.mem32[0xd0000034] = (machine.mem32[0xd0000034] & 0xfffffffe) | valH
+    machine.mem32[0xd0000040] = (0x7f << 25) & ~valL # OE_CLR
+    machine.mem32[0xd0000038] = valL # OE_SET
+    machine.mem32[0xd0000044] = 1 & ~valH # OE_CLR HI
+    machine.mem32[0xd000003C] = valH # OE_SET HI
                                  
 ###@micropython.native
 def write_uo_out_byte(val):
@@ -135,6 +176,21 @@ def write_uo_out_byte(val):
 def read_uo_out_byte():
     return ( (machine.mem32[0xd0000008] & (0xff << 1)) >> 1)
 
+###@micropython.native
+def sample_all():
+    # one read of each GPIO_IN bank, GPIO 32-47 in the upper bits
+    low = machine.mem32[0xd0000004]
+    return (machine.mem32[0xd0000008] << 32) | (low & 0xffffffff)
+
+def unpack_sample(sample:int):
+    '''
+        (ui_in, uo_out, uio) from a sample_all() word
+    '''
+    ui_in = (sample >> 17) & 0xff
+    uo_out = (sample >> 33) & 0xff
+    uio = (sample >> 25) & 0xff # 25-31 and 32 are contiguous here
+    return (ui_in, uo_out, uio)
+
 ###@micropython.native
 def read_clock():
     # clock is on GPIO16
@@ -149,3 +205,140 @@ def write_clock(val):
     else:
         machine.mem32[0xd0000020] = (1 << 16)
     
+
+###@micropython.native
+def play_stimulus(ui_in_buf, uio_in_buf=None):
+    # one clock per entry: set inputs, clock high, clock low
+    # mapping as in write_ui_in_byte and write_uio_byte
+    mem32 = machine.mem32
+    num_entries = len(ui_in_buf)
+    if uio_in_buf is None:
+        for i in range(num_entries):
+            mem32[0xd0000028] = (mem32[0xd0000010] ^ (ui_in_buf[i] << 17)) & (0xff << 17)
+            mem32[0xd0000018] = (1 << 16) # clock high
+            mem32[0xd0000020] = (1 << 16) # clock low
+        return num_entries
+    
+    for i in range(num_entries):
+        val = uio_in_buf[i]
+        # ui_in and low 7 uio bits are all in the low bank, in one XOR
+        mem32[0xd0000028] = (mem32[0xd0000010] ^ ((ui_in_buf[i] << 17) | ((val & 0x7f) << 25))) & (0x7fff << 17)
+        mem32[0xd000002C] = (mem32[0xd0000014] ^ (val >> 7)) & 1
+        mem32[0xd0000018] = (1 << 16) # clock high
+        mem32[0xd0000020] = (1 << 16) # clock low
+    return num_entries
+
+
+# output capture: uio_out on GPIO25-32, uo_out on 33-40, so 
+# sampling 16 pins from 25 gets uio_out in the low byte and 
+# uo_out in the high byte.  Runs in PIO2 so its GPIO base 
+# can move up to 16 without bothering anyone else
+CaptureStateMachineID = 8
+CaptureRXFIFO = 0x50400020 # PIO2 RXF0
+CaptureDREQ = 20 # PIO2 RX0
+
+@rp2.asm_pio(sideset_init=rp2.PIO.OUT_LOW, in_shiftdir=rp2.PIO.SHIFT_LEFT)
+def _pio_capture_falling():
+    # clocks cycle count - 1 times, sampling just before each falling edge
+    pull(block)         .side(0)
+    mov(x, osr)         .side(0)
+    label("cycle")
+    nop()               .side(1)
+    in_(pins, 16)       .side(1)
+    push(block)         .side(0)
+    jmp(x_dec, "cycle") .side(0)
+    
+@rp2.asm_pio(sideset_init=rp2.PIO.OUT_LOW, in_shiftdir=rp2.PIO.SHIFT_LEFT)
+def _pio_capture_rising():
+    # clocks cycle count - 1 times, sampling just before each rising edge
+    pull(block)         .side(0)
+    mov(x, osr)         .side(0)
+    label("cycle")
+    in_(pins, 16)       .side(0)
+    push(block)         .side(0)
+    nop()               .side(1)
+    jmp(x_dec, "cycle") .side(1)
+
+def _capture_outputs_pio(buf, n_cycles:int, ports:tuple, sample_on_rising:bool, clock_hz:int):
+    # DMA straight out of the RX FIFO: bytes when capturing a single 
+    # port, halfwords (byte swapped if uo_out comes first) for both
+    if len(ports) == 2:
+        in_gpio = 25
+        size = 1
+        bswap = ports[0] == 'uo_out'
+    else:
+        in_gpio = 33 if ports[0] == 'uo_out' else 25
+        size = 0
+        bswap = False
+    
+    rp2.PIO(2).gpio_base(16)
+    clk_pin = machine.Pin(16)
+    prog = _pio_capture_rising if sample_on_rising else _pio_capture_falling
+    sm = rp2.StateMachine(CaptureStateMachineID, prog, freq=4*clock_hz,
+                          sideset_base=clk_pin, in_base=machine.Pin(in_gpio))
+    dma = rp2.DMA()
+    try:
+        ctrl = dma.pack_ctrl(size=size, inc_read=False, treq_sel=CaptureDREQ, bswap=bswap)
+        dma.config(read=CaptureRXFIFO, write=buf, count=n_cycles, ctrl=ctrl, trigger=True)
+        sm.put(n_cycles - 1)
+        sm.active(1)
+        while dma.active():
+            pass
+    finally:
+        sm.active(0)
+        dma.close()
+        # hand the clock back to regular GPIO
+        clk_pin.init(machine.Pin.OUT, value=0)
+        
+###@micropython.native
+def _capture_outputs_loop(buf, n_cycles:int, ports:tuple, sample_on_rising:bool):
+    mem32 = machine.mem32
+    num_ports = len(ports)
+    uo_idx = ports.index('uo_out') if 'uo_out' in ports else -1
+    uio_idx = ports.index('uio_out') if 'uio_out' in ports else -1
+    pos = 0
+    for _i in range(n_cycles):
+        if not sample_on_rising:
+            mem32[0xd0000018] = (1 << 16) # clock high
+        # one read of each bank, for a coherent sample
+        low = mem32[0xd0000004]
+        high = mem32[0xd0000008]
+        if uo_idx >= 0:
+            buf[pos + uo_idx] = (high >> 1) & 0xff
+        if uio_idx >= 0:
+            buf[pos + uio_idx] = ((high & 1) << 7) | ((low >> 25) & 0x7f)
+        pos += num_ports
+        if sample_on_rising:
+            mem32[0xd0000018] = (1 << 16) # clock high
+        mem32[0xd0000020] = (1 << 16) # clock low
+    return n_cycles
+
+def capture_clock_range():
+    '''
+        (min, max) clock_hz capture_outputs() can run at: the state 
+        machine does 4 cycles per project clock, and its divider
+        only goes so far at the current system clock.
+    '''
+    sys_clk = machine.freq()
+    return ((sys_clk // 65536 + 1 + 3) // 4, sys_clk // 4)
+
+def capture_outputs(buf, n_cycles:int, ports:tuple, sample_on_rising:bool, clock_hz:int):
+    '''
+        Clocks the project n_cycles times, filling buf with a byte 
+        per port in ports, per cycle.
+        Uses PIO and DMA when available, else a register loop
+        (that runs at whatever speed it can).
+        @raise ValueError: clock_hz outside of capture_clock_range()
+        @return: True if PIO/DMA was used
+    '''
+    (min_hz, max_hz) = capture_clock_range()
+    if clock_hz < min_hz or clock_hz > max_hz:
+        raise ValueError(f'Capture clock must be within {min_hz}-{max_hz}Hz')
+    try:
+        _capture_outputs_pio(buf, n_cycles, ports, sample_on_rising, clock_hz)
+        return True
+    except (AttributeError, OSError):
+        # no gpio_base() in this build, or PIO/DMA unavailable
+        pass
+    _capture_outputs_loop(buf, n_cycles, ports, sample_on_rising)
+    return False
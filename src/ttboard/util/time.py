@@ -16,4 +16,10 @@ if not IsRP2:
         sleep(v/1000000)
         
     def ticks_us():
-        return int(time())
+        return int(time()*1000000)
+    
+    def ticks_ms():
+        return int(time()*1000)
+    
+    def ticks_diff(end, start):
+        return end - start
@@ -2,3 +2,13 @@ def pytest_addoption(parser):
     parser.addoption("--shuttle", action="store", default="shuttle of interest")
     parser.addoption("--shuttlepath", action="store", default="directory for shuttle files")
 
+
+import os
+import pytest
+
+@pytest.fixture(scope="session")
+def demoboard():
+    # single DemoBoard, on the desktop platform
+    from ttboard.demoboard import DemoBoard
+    inifile = os.path.join(os.path.dirname(__file__), '..', 'src', 'config.ini')
+    return DemoBoard(apply_user_config=False, iniFile=inifile)
@@ -0,0 +1,78 @@
+import pytest
+from ttboard.util.clock_planner import ClockPlanner
+
+def scan_reference(freq:int, max_rp2040_freq:int=133_000_000):
+    # the float scan previously in DemoBoard._get_best_rp2040_freq
+    min_rp2040_freq = 48_000_000
+
+    if freq > max_rp2040_freq // 2:
+        raise ValueError("Requested frequency too high")
+    if freq <= min_rp2040_freq // (2**24 - 1):
+        raise ValueError("Requested frequency too low")
+
+    best_freq = 0
+    best_fracdiv = 2000000000
+
+    rp2040_freq = min(max_rp2040_freq, freq * (2**24 - 1))
+    if rp2040_freq > 136_000_000:
+        rp2040_freq = (rp2040_freq // 2_000_000) * 2_000_000
+    else:
+        rp2040_freq = (rp2040_freq // 1_000_000) * 1_000_000
+
+    while rp2040_freq >= 48_000_000 and rp2040_freq >= 1.9 * freq:
+        next_rp2040_freq = rp2040_freq - 1_000_000
+        if next_rp2040_freq > 136_000_000:
+            next_rp2040_freq = rp2040_freq - 2_000_000
+
+        pwm_divisor = max((rp2040_freq // (2 * freq)) * 2, 2)
+        if abs(int(rp2040_freq / pwm_divisor + 0.5) - freq) > abs(
+            int(rp2040_freq / (pwm_divisor + 2) + 0.5) - freq
+        ):
+            pwm_divisor += 2
+
+        fracdiv = abs(rp2040_freq / freq - pwm_divisor)
+        if freq == rp2040_freq // pwm_divisor:
+            return rp2040_freq
+        elif fracdiv < best_fracdiv:
+            best_fracdiv = fracdiv
+            best_freq = rp2040_freq
+
+        rp2040_freq = next_rp2040_freq
+
+    return best_freq
+
+MaxSysClocks = [133_000_000, 150_000_000, 250_000_000]
+
+def test_equivalent_low_frequencies():
+    # every target up to 20kHz, where the divisors are huge
+    for max_clk in MaxSysClocks:
+        for freq in range(3, 20_000):
+            assert ClockPlanner._scan(freq, max_clk) == scan_reference(freq, max_clk), f'{freq}Hz max {max_clk}'
+
+def test_equivalent_full_range():
+    for max_clk in MaxSysClocks:
+        for freq in list(range(20_000, max_clk // 2, 7919)) + list(range(max_clk // 2 - 5000, max_clk // 2 + 1)):
+            assert ClockPlanner._scan(freq, max_clk) == scan_reference(freq, max_clk), f'{freq}Hz max {max_clk}'
+
+def test_range_errors():
+    for freq in [0, 1, 2, 66_500_001]:
+        with pytest.raises(ValueError):
+            scan_reference(freq)
+        with pytest.raises(ValueError):
+            ClockPlanner.best_system_clock(freq)
+
+def test_cache_and_current_clock():
+    ClockPlanner.clear_cache()
+    assert ClockPlanner.best_system_clock(10_000_000) == scan_reference(10_000_000)
+    assert (10_000_000, 133_000_000) in ClockPlanner._cache
+    
+    # 125MHz divides to 12.5MHz exactly, no need to change clocks
+    assert ClockPlanner.best_system_clock(12_500_000, current_sys_clk=125_000_000) == 125_000_000
+    # but not 10.1MHz
+    assert ClockPlanner.best_system_clock(10_100_000, current_sys_clk=125_000_000) == scan_reference(10_100_000)
+    # nor if outside the allowed range
+    assert ClockPlanner.best_system_clock(12_500_000, 100_000_000, current_sys_clk=125_000_000) <= 100_000_000
+    
+    for i in range(ClockPlanner.CacheSize * 2):
+        ClockPlanner.best_system_clock(1000 + i)
+    assert len(ClockPlanner._cache) <= ClockPlanner.CacheSize
@@ -0,0 +1,225 @@
+import pytest
+import ttboard.util.platform as plat
+from microcotb.clock import Clock
+from microcotb.time.system import SystemTime
+from microcotb.triggers.clockcycles import ClockCycles
+from microcotb.testcase import TestCase
+import ttboard.cocotb.dut as dutmod
+from ttboard.cocotb.dut import DUT, ClockCyclesOffload
+
+CyclePlan = [(1, True), (3, True), (1, False), (256, True),
+             (2, False), (9, True), (100, False), (7, True)]
+
+def run_plan(dut, monkeypatch, period, units, plan):
+    edges = [0, 0] # rising, python writes
+    level = [plat.read_clock()]
+    write_clock = plat.write_clock
+    def record(val):
+        if val and not level[0]:
+            edges[0] += 1
+        level[0] = val
+        edges[1] += 1
+        write_clock(val)
+
+    monkeypatch.setattr(plat, 'write_clock', record)
+    # the clock pin has its own, bound at import
+    monkeypatch.setattr(dutmod, '_write_clock', record)
+
+    burst = dut.tt.clock_burst
+    cycles_before = burst.cycles_sent
+    Clock.clear_all()
+    SystemTime.reset()
+    clock = Clock(dut.clk, period, units)
+    clock.start()
+    times = []
+    for n, rising in plan:
+        with pytest.raises(StopIteration):
+            ClockCycles(dut.clk, n, rising).next()
+        times.append(SystemTime.current()._t_baseunits)
+
+    monkeypatch.undo()
+    return (times, clock.current_signal_value, clock.next_toggle._t_baseunits,
+            edges[0] + burst.cycles_sent - cycles_before, edges[1])
+
+@pytest.mark.parametrize('period,units,offloads', [(10, 'us', True), (2, 'us', True), 
+                                                   (100, 'ns', True), (1, 'ms', False)])
+def test_clock_cycles_offload(demoboard, monkeypatch, period, units, offloads):
+    dut = DUT()
+    dut.testing_will_begin()
+    assert ClockCyclesOffload.install(dut)
+    try:
+        dut.offload_clock_cycles = False
+        stepped = run_plan(dut, monkeypatch, period, units, CyclePlan)
+        dut.offload_clock_cycles = True
+        offloaded = run_plan(dut, monkeypatch, period, units, CyclePlan)
+    finally:
+        ClockCyclesOffload.uninstall()
+        dut.testing_done()
+        Clock.clear_all()
+        SystemTime.reset()
+
+    # same simulated time, clock state and number of edges...
+    assert offloaded[:4] == stepped[:4]
+    if offloads:
+        # ... for a fraction of the pin writes
+        assert offloaded[4] * 10 < stepped[4]
+    else:
+        # half period not in whole base units: stepped as usual
+        assert offloaded[4] == stepped[4]
+
+def run_unit(dut, body):
+    test = TestCase('test_offload_scope', body)
+    dut.testing_unit_start(test)
+    test.run(dut)
+    return test
+
+def test_clock_cycles_offload_scope(demoboard, monkeypatch):
+    original_next = ClockCycles.next
+    dut = DUT()
+    seen = []
+    async def body(dut):
+        seen.append(ClockCyclesOffload.installed())
+        raise RuntimeError('aborted')
+    
+    dut.testing_will_begin()
+    assert not ClockCyclesOffload.installed()
+    with pytest.raises(RuntimeError):
+        run_unit(dut, body)
+    # in place while the test ran, gone though it blew up
+    assert seen == [True]
+    assert not ClockCyclesOffload.installed()
+    assert ClockCycles.next is original_next
+    
+    # microcotb internals gone: no offload at all
+    monkeypatch.delattr(SystemTime, '_timeout_setting')
+    assert not ClockCyclesOffload.supported()
+    with pytest.raises(RuntimeError):
+        run_unit(dut, body)
+    assert seen == [True, False]
+    assert ClockCycles.next is original_next
+    dut.testing_done()
+
+def test_deferred_writes(demoboard, monkeypatch):
+    written = []
+    write_ports = plat.write_ports
+    def record(ui_in=None, uio_in=None):
+        written.append((ui_in, uio_in))
+        write_ports(ui_in, uio_in)
+    monkeypatch.setattr(plat, 'write_ports', record)
+
+    dut = DUT()
+    dut.ui_in.value = 0
+    dut.uio_in.value = 0
+    assert not len(written)
+
+    dut.set_deferred_writes(True)
+    assert dut.deferring_writes
+    try:
+        dut.ui_in.value = 0x12
+        dut.ui_in = 0x34
+        dut.ui_in[0] = 1
+        dut.uio_in.value = 0xa5
+        dut.rst_n.value = 1
+        # nothing out yet...
+        assert not len(written)
+        assert dut.pending_write('ui_in') == 0x35
+        # ... until the clock edge, in one go
+        dut.clk.value = 1
+        assert written == [(0x35, 0xa5)]
+        assert dut.pending_write('ui_in') is None
+        assert dut.tt.rst_n() == 1
+        dut.clk.value = 0
+        assert len(written) == 1
+
+        # reads see everything that was written
+        dut.uio_in[7] = 0
+        assert int(dut.uio_in.value) == 0x25
+        assert written[-1] == (None, 0x25)
+    finally:
+        dut.set_deferred_writes(False)
+
+    assert not dut.deferring_writes
+    assert dut.ui_in is dut.tt.ui_in
+    dut.ui_in.value = 0x56
+    assert int(dut.tt.ui_in.value) == 0x56
+
+def test_signal_fast_paths(demoboard):
+    dut = DUT()
+    # pin direction changed behind the wrapper's back
+    dut.tt.rst_n.mode = demoboard.pins.IN
+    dut.rst_n.value = 0
+    assert not dut.tt.rst_n.is_input
+    assert dut.rst_n.value == 0
+    dut.rst_n.value = 1
+    assert dut.rst_n.value == 1
+
+    # ints straight to the port, anything else the generic way
+    dut.ui_in.value = 0x81
+    assert dut.ui_in.last_value == 0x81
+    assert dut.ui_in.value == 0x81
+    dut.ui_in.value = '00001111'
+    assert dut.ui_in.last_value == 0x0f
+    dut.ui_in = 0x42
+    assert int(dut.ui_in.value) == 0x42
+    with pytest.raises(ValueError):
+        dut.ui_in.value = 0x100
+    
+    # reads are regular LogicArrays, writing back through them too
+    val = dut.ui_in.value
+    assert str(val) == '01000010' and val[1] == 1 and val[0] == 0
+    val[0] = 1
+    assert dut.ui_in.last_value == 0x43
+    assert int(dut.ui_in) == 0x43
+    assert int(dut.uo_out) == int(dut.uo_out.value)
+
+    edges = []
+    dut.clk.before_edge = lambda: edges.append(plat.read_clock())
+    dut.clk.value = 1
+    dut.clk.value = 0
+    assert edges == [0, 1]
+    dut.clk.before_edge = None
+    dut.clk.value = 1
+    assert len(edges) == 2
+    dut.clk.value = 0
+
+def test_deferred_writes_demoboard_clocking(demoboard, monkeypatch):
+    events = []
+    write_ports = plat.write_ports
+    def record(ui_in=None, uio_in=None):
+        events.append(('ports', ui_in, uio_in))
+        write_ports(ui_in, uio_in)
+    monkeypatch.setattr(plat, 'write_ports', record)
+    
+    dut = DUT()
+    tt = dut.tt
+    burst = tt.clock_burst
+    start = burst.start
+    monkeypatch.setattr(burst, 'start', lambda n, freq=None: (events.append(('burst', n)), start(n, freq)))
+    clocked_by_rp2 = tt.pins.project_clk_driven_by_RP2
+    monkeypatch.setattr(tt.pins, 'project_clk_driven_by_RP2', 
+                        lambda v: (events.append(('clock',)), clocked_by_rp2(v)))
+    
+    dut.set_deferred_writes(True)
+    try:
+        # clocked from the DemoBoard, not dut.clk: 
+        # held writes still go out first
+        dut.ui_in.value = 0x12
+        tt.clock_project_once()
+        assert events == [('ports', 0x12, None), ('clock',)]
+        assert dut.pending_write('ui_in') is None
+        
+        events.clear()
+        dut.uio_in.value = 0x34
+        dut.rst_n.value = 0
+        tt.clock_cycles(4)
+        assert events == [('ports', None, 0x34), ('clock',), ('burst', 4)]
+        assert tt.rst_n() == 0
+        
+        # nothing held, nothing written
+        events.clear()
+        tt.clock_project_once()
+        assert events == [('clock',)]
+    finally:
+        dut.set_deferred_writes(False)
+    
+    assert tt.before_clocking is None
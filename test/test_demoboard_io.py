@@ -0,0 +1,153 @@
+from array import array
+import pytest
+import ttboard.util.platform.desktop as desktop
+import ttboard.util.platform as platform
+
+def test_play_stimulus(demoboard):
+    desktop.PlayedStimulus.clear()
+    ui_in = array('B', [0x01, 0x80, 0xff, 0x00, 0x42])
+    assert demoboard.play_stimulus(ui_in) == len(ui_in)
+    assert desktop.PlayedStimulus == list(map(lambda v: (v, None), ui_in))
+    
+    desktop.PlayedStimulus.clear()
+    uio_in = bytearray([5, 4, 3, 2, 1])
+    assert demoboard.play_stimulus(ui_in, uio_in) == len(ui_in)
+    assert desktop.PlayedStimulus == list(zip(ui_in, uio_in))
+    
+    # ports know where they were left
+    assert demoboard.ui_in.last_value == 0x42
+    assert demoboard.uio_in.last_value == 1
+    
+    with pytest.raises(ValueError):
+        demoboard.play_stimulus(ui_in, uio_in[:2])
+    
+def test_capture(demoboard):
+    desktop.write_uo_out_byte(0x5a)
+    desktop.write_uio_byte(0x33)
+    
+    cycles_before = desktop.CapturedCycles
+    samples = demoboard.capture(4)
+    assert samples == bytearray([0x5a, 0x33]*4)
+    assert desktop.CapturedCycles == cycles_before + 4
+    
+    buf = array('B', [0]*10)
+    assert demoboard.capture(3, ['uio_out', 'uo_out'], buf, edge='rising') is buf
+    assert list(buf[:6]) == [0x33, 0x5a]*3
+    assert list(buf[6:]) == [0]*4
+    
+    with pytest.raises(ValueError):
+        demoboard.capture(4, ['ui_in'])
+    with pytest.raises(ValueError):
+        demoboard.capture(4, ['uo_out', 'uo_out'])
+    with pytest.raises(ValueError):
+        demoboard.capture(4, buf=bytearray(7))
+    with pytest.raises(ValueError):
+        demoboard.capture(4, edge='sideways')
+    
+def test_capture_clock_range(demoboard):
+    (min_hz, max_hz) = platform.capture_clock_range()
+    assert 0 < min_hz < 1_000_000 < max_hz
+    cycles_before = desktop.CapturedCycles
+    for clock_hz in [min_hz - 1, max_hz + 1, 0]:
+        # refused outright, rather than captured at some other rate
+        with pytest.raises(ValueError):
+            demoboard.capture(4, clock_hz=clock_hz)
+        with pytest.raises(ValueError):
+            demoboard.check_outputs(bytes(4), clock_hz=clock_hz)
+    assert desktop.CapturedCycles == cycles_before
+    
+    demoboard.capture(4, clock_hz=min_hz)
+    demoboard.capture(4, clock_hz=max_hz)
+    assert desktop.CapturedCycles == cycles_before + 8
+    
+def test_snapshot(demoboard):
+    desktop.write_ui_in_byte(0x81)
+    desktop.write_uo_out_byte(0x7e)
+    desktop.write_uio_byte(0xc3)
+    snap = demoboard.pins.snapshot()
+    assert (snap.ui_in, snap.uo_out, snap.uio) == (0x81, 0x7e, 0xc3)
+    
+def test_write_ports(demoboard):
+    demoboard.write_ports(ui_in=0x12, uio_in=0xa5)
+    assert (desktop._inbyte, desktop._uio_byte) == (0x12, 0xa5)
+    assert demoboard.ui_in.last_value == 0x12
+    assert demoboard.uio_in.last_value == 0xa5
+    
+    demoboard.write_ports(uio_in=0x3c)
+    assert (desktop._inbyte, desktop._uio_byte) == (0x12, 0x3c)
+    demoboard.write_ports(ui_in=0x1ff)
+    assert (desktop._inbyte, desktop._uio_byte) == (0xff, 0x3c)
+    
+def test_bit_writes(demoboard):
+    demoboard.write_ports(ui_in=0, uio_in=0)
+    demoboard.ui_in[3] = 1
+    demoboard.uio_in[7] = True
+    assert (desktop._inbyte, desktop._uio_byte) == (0x08, 0x80)
+    assert demoboard.ui_in.last_value == 0x08
+    assert demoboard.uio_in.last_value == 0x80
+    
+    demoboard.ui_in[0] = 1
+    demoboard.ui_in[3] = 0
+    assert desktop._inbyte == 0x01
+    assert demoboard.ui_in.last_value == 0x01
+    
+    # slices still go the long way round
+    demoboard.ui_in[7:4] = 0xa
+    assert desktop._inbyte == 0xa1
+    
+def test_check_outputs(demoboard):
+    desktop.write_uo_out_byte(0x5a)
+    expected = bytearray([0x5a]*10)
+    
+    cycles_before = desktop.CapturedCycles
+    assert demoboard.check_outputs(expected) == (None, 0)
+    assert desktop.CapturedCycles == cycles_before + 10
+    
+    expected[4] = 0x5b
+    expected[7] = 0x00
+    expected[8] = 0xda
+    # same result however it's chunked
+    assert demoboard.check_outputs(expected) == (4, 3)
+    assert demoboard.check_outputs(expected, chunk_cycles=3) == (4, 3)
+    assert demoboard.check_outputs(expected, chunk_cycles=1) == (4, 3)
+    
+    # only compare the low nibble, after the first few
+    mask = array('B', [0]*5 + [0x0f]*5)
+    assert demoboard.check_outputs(expected, mask, chunk_cycles=4) == (7, 1)
+    
+    assert demoboard.check_outputs(bytearray()) == (None, 0)
+    with pytest.raises(ValueError):
+        demoboard.check_outputs(expected, mask[:3])
+    with pytest.raises(ValueError):
+        demoboard.check_outputs(expected, port='ui_in')
+    
+def test_clock_cycles(demoboard):
+    burst = demoboard.clock_cycles(1000)
+    assert burst.done
+    assert burst.bursts[-1] == (1000, None)
+    
+    sent = burst.cycles_sent
+    assert demoboard.clock_cycles(256, 10_000_000, blocking=False) is burst
+    assert burst.cycles_sent == sent + 256
+    assert burst.bursts[-1] == (256, 10_000_000)
+    
+    demoboard.clock_cycles(0)
+    assert burst.cycles_sent == sent + 256
+    
+def test_burst_finished_before_clocking(demoboard, monkeypatch):
+    burst = demoboard.clock_cycles(500, blocking=False)
+    calls = []
+    monkeypatch.setattr(burst, 'wait', lambda: calls.append('wait'))
+    capture_outputs = platform.capture_outputs
+    def record_capture(*args):
+        calls.append('capture')
+        return capture_outputs(*args)
+    monkeypatch.setattr(platform, 'capture_outputs', record_capture)
+    
+    # the burst owns the clock pin until it's done
+    demoboard.capture(4, ['uo_out'])
+    assert calls == ['wait', 'capture']
+    
+    calls.clear()
+    demoboard.play_stimulus(bytearray(3))
+    assert calls == ['wait']
@@ -0,0 +1,84 @@
+import os
+import pytest
+from ttboard.project_mux import DesignIndex
+from ttboard.project_design import Design, DesignCache, DesignStub
+
+@pytest.fixture(scope="session")
+def shuttle(pytestconfig):
+    return pytestconfig.getoption("shuttle")
+
+@pytest.fixture(scope="session")
+def shuttlepath(pytestconfig):
+    return pytestconfig.getoption("shuttlepath")
+
+def test_cache_lru_order():
+    cache = DesignCache(max_designs=2)
+    for address in [1, 2]:
+        cache.put(Design(None, f'tt_um_des_{address}', address))
+    
+    assert cache.get(1) is not None # 2 is now least recently used
+    cache.put(Design(None, 'tt_um_des_3', 3))
+    assert 2 not in cache
+    assert 1 in cache and 3 in cache
+    assert cache.get(2) is None
+    assert cache.stats['hits'] == 1
+    assert cache.stats['misses'] == 1
+    assert cache.stats['evictions'] == 1
+    
+def test_cache_bytes_limit():
+    des = Design(None, 'tt_um_des_1', 1)
+    cache = DesignCache(max_bytes=3*DesignCache.size_estimate(des))
+    for address in range(10):
+        cache.put(Design(None, f'tt_um_des_{address}', address))
+    assert len(cache) == 3
+    assert cache.stats['bytes'] <= cache.max_bytes
+    
+    cache.resize(max_designs=1)
+    assert len(cache) == 1
+    assert 9 in cache
+
+def test_index_evicts_to_stubs(shuttle, shuttlepath):
+    shuttle_json_file = os.path.join(shuttlepath, f'{shuttle}.json')
+    idx = DesignIndex(None, shuttle_json_file, max_cached_designs=4)
+    
+    stubs = idx.all
+    names = list(map(lambda d: d.name, stubs))
+    assert len(idx.cache) == 4
+    assert idx.cache_stats['misses'] >= len(stubs)
+    
+    # evicted designs come back on demand, same info
+    assert stubs[0].name == names[0]
+    assert idx.get(stubs[0].project_index).name == names[0]
+    assert idx.cache_stats['hits'] >= 1
+    
+    # all() gives stubs for anything no longer cached
+    assert repr(idx.all[-1]).find('uninit') < 0
+    assert repr(idx.all[1]).find('uninit') >= 0
+    
+    idx.configure_cache(strict_memory_saving=True)
+    assert len(idx.cache) == 1
+    idx.configure_cache(strict_memory_saving=False)
+
+def test_strict_lookup_after_eviction(shuttle, shuttlepath, tmp_path):
+    shuttle_json_file = os.path.join(shuttlepath, f'{shuttle}.json')
+    jsonIndex = DesignIndex(None, None)
+    jsonIndex.load_available(shuttle_json_file, force_json=True)
+    (first, second) = (jsonIndex.all[3], jsonIndex.all[10])
+    
+    for version in [1, 3]:
+        bin_file = str(tmp_path / f'v{version}.bin')
+        jsonIndex.to_bin_file(bin_file, version=version)
+        idx = DesignIndex(None, None, strict_memory_saving=True)
+        idx.load_serialized(bin_file)
+        
+        assert idx.get(first.name).count == first.count
+        assert idx.get(second.name).count == second.count
+        assert first.count not in idx.cache
+        
+        # evicted, but still found, by name and by address
+        assert idx.project_index(first.name) == first.count
+        assert idx.project_name(first.count) == first.name
+        assert idx.get(first.count).name == first.name
+        assert DesignStub(idx, second.count).name == second.name
+        assert getattr(idx, first.name).count == first.count
+        assert len(idx.cache) == 1
@@ -0,0 +1,25 @@
+from ttboard.pins.gpio_map_dbv3 import GPIOMapTTDBv3, GPIOMapTTDBv3Alpha
+
+def test_tables_cached():
+    assert GPIOMapTTDBv3.tables() is GPIOMapTTDBv3.tables()
+    assert GPIOMapTTDBv3.tables() is not GPIOMapTTDBv3Alpha.tables()
+    
+def test_tables_match_map():
+    for gpio_map in [GPIOMapTTDBv3, GPIOMapTTDBv3Alpha]:
+        tables = gpio_map.tables()
+        all_pins = gpio_map.all()
+        assert dict(map(lambda p: (p[0], p[1]), tables.pins)) == all_pins
+        assert tables.names == tuple(sorted(all_pins.keys()))
+        assert tables.always_outputs == tuple(gpio_map.always_outputs())
+        for port in ['ui_in', 'uo_out', 'uio']:
+            names = getattr(tables, port)
+            assert names == tuple(map(lambda i: f'{port}{i}', range(8)))
+            gpios = getattr(tables, f'{port}_gpios')
+            assert gpios == tuple(map(lambda n: all_pins[n], names))
+            assert getattr(tables, f'{port}_mask') == sum(map(lambda g: 1 << g, gpios))
+            
+def test_dbv3_masks():
+    tables = GPIOMapTTDBv3.tables()
+    assert tables.ui_in_mask == 0xff << 17
+    assert tables.uio_mask == 0xff << 25
+    assert tables.uo_out_mask == 0xff << 33
@@ -0,0 +1,53 @@
+import io
+import json
+import pytest
+from ttboard.util.json_stream import array_items
+
+Tricky = {
+    'version': 3,
+    'meta': {'note': 'has "projects" in a string {and braces}', 'list': [1, 2, {'a': '}'}]},
+    'projects': [
+        {'macro': 'tt_um_plain', 'address': 1, 'clock_hz': 0},
+        {'macro': 'tt_um_braces', 'title': 'a {weird} title }}', 'address': '2', 'clock_hz': 10},
+        {'macro': 'tt_um_escapes', 'title': 'quote \" and backslash \\ and \\" mix', 'address': 3, 'clock_hz': 1},
+        {'macro': 'tt_um_nested', 'extra': {'deep': [{'x': 1}, {'y': '{'}]}, 'address': 4, 'clock_hz': 2},
+        {'macro': 'tt_um_unicode', 'title': 'café ☃', 'address': 5, 'clock_hz': 3},
+    ],
+    'trailing': {'ignored': True}
+}
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 64, 4096])
+@pytest.mark.parametrize('indent', [None, 2])
+def test_array_items_matches_json_load(chunk_size, indent):
+    text = json.dumps(Tricky, indent=indent)
+    streamed = list(array_items(io.StringIO(text), 'projects', chunk_size))
+    assert streamed == Tricky['projects']
+    
+def test_array_items_stops_early():
+    text = json.dumps(Tricky)
+    fh = io.StringIO(text)
+    for project in array_items(fh, 'projects', 16):
+        if project['macro'] == 'tt_um_braces':
+            break
+    assert fh.tell() < len(text)
+    
+def test_array_items_empty_and_bad():
+    assert list(array_items(io.StringIO('{"projects": [ ]}'), 'projects')) == []
+    with pytest.raises(ValueError):
+        list(array_items(io.StringIO('{"nope": []}'), 'projects'))
+    with pytest.raises(ValueError):
+        list(array_items(io.StringIO('{"projects": [{"a": 1}, {"b": '), 'projects'))
+    
+@pytest.mark.parametrize('chunk_size', [1, 5, 64, 4096])
+def test_array_items_top_level_key_only(chunk_size):
+    text = ('{"meta": {"projects": [{"macro": "tt_um_nested_decoy"}], "n": 12},'
+            ' "title": "projects", "list": ["projects", {"projects": []}], "ok": true,'
+            ' "count": -1.5e3, "none": null, "projects": [{"macro": "tt_um_real", "address": 1}]}')
+    assert json.loads(text)['projects'] == [{'macro': 'tt_um_real', 'address': 1}]
+    streamed = list(array_items(io.StringIO(text), 'projects', chunk_size))
+    assert streamed == [{'macro': 'tt_um_real', 'address': 1}]
+    
+    with pytest.raises(ValueError):
+        # only nested, no top-level projects
+        list(array_items(io.StringIO('{"meta": {"projects": [{"a": 1}]}, "title": "projects"}'), 
+                         'projects', chunk_size))
@@ -0,0 +1,93 @@
+import pytest
+from ttboard.mode import RPMode, RPModeDEVELOPMENT
+from ttboard.pins.pins import Pins
+
+@pytest.fixture
+def pins():
+    return Pins(RPMode.SAFE)
+
+def all_pin_objects(pins):
+    return dict(map(lambda p: (p.name, p), pins.all))
+
+def test_pins_created_once(pins):
+    before = all_pin_objects(pins)
+    for mode in [RPMode.ASIC_RP_CONTROL, RPModeDEVELOPMENT.STANDALONE, 
+                 RPMode.ASIC_MANUAL_INPUTS, RPMode.SAFE]:
+        pins.mode = mode
+        after = all_pin_objects(pins)
+        assert after.keys() == before.keys()
+        for name in before:
+            assert after[name] is before[name]
+            assert getattr(pins, name) is before[name]
+    
+def test_only_deltas_applied(pins):
+    pins.mode = RPMode.SAFE
+    # only the pins PIO may have taken over (clock, cinc) are redone
+    assert pins.mode_switch_pins_changed == 2
+    
+    pins.mode = RPMode.ASIC_RP_CONTROL
+    # 8 ui_in now outputs, along with the clock
+    assert pins.mode_switch_pins_changed == 10
+    for p in pins.list_port('ui_in'):
+        assert not p.is_input
+    assert not pins.rp_projclk.is_input
+    
+    # ui_in get checked for contention again, so are set up anew
+    pins.mode = RPMode.ASIC_RP_CONTROL
+    assert pins.mode_switch_pins_changed == 10
+    
+    pins.mode = RPMode.SAFE
+    for p in pins.list_port('ui_in'):
+        assert p.is_input
+    assert pins.mode_switch_us >= 0
+    
+def test_contention_checks(pins):
+    pins.ui_in3.raw_pin.val = 1
+    pins.mode = RPMode.ASIC_RP_CONTROL
+    assert pins.ui_in3.is_input
+    assert not pins.ui_in2.is_input
+    
+    pins.mode = RPMode.SAFE
+    pins.dieOnInputControlSwitchHigh = False
+    pins.mode = RPMode.ASIC_RP_CONTROL
+    assert not pins.ui_in3.is_input
+    
+    # unchecked output gets looked at again
+    pins.dieOnInputControlSwitchHigh = True
+    pins.mode = RPMode.ASIC_RP_CONTROL
+    assert pins.ui_in3.is_input
+    assert not pins.ui_in2.is_input
+    
+    # as do outputs that passed the check before, should 
+    # something start driving them in the meantime
+    pins.ui_in2.raw_pin.val = 1
+    pins.mode = RPMode.ASIC_RP_CONTROL
+    assert pins.ui_in2.is_input
+    pins.ui_in2.raw_pin.val = 0
+    pins.ui_in3.raw_pin.val = 0
+    pins.mode = RPMode.ASIC_RP_CONTROL
+    assert not pins.ui_in2.is_input and not pins.ui_in3.is_input
+    
+def test_bulk_bidir(pins):
+    import ttboard.util.platform.desktop as desktop
+    pins.set_bidir(0x0f, 0xa5)
+    assert (desktop._uio_oe_pico, desktop._uio_byte) == (0x0f, 0xa5)
+    assert pins.uio_oe_pico.port.last_value == 0x0f
+    assert pins.uio_in.last_value == 0xa5
+    uio_pins = pins.list_port('uio')
+    assert list(map(lambda p: p.is_input, uio_pins)) == [False]*4 + [True]*4
+    
+    # port writes keep the pins in sync too
+    pins.uio_oe_pico.value = 0x81
+    assert desktop._uio_oe_pico == 0x81
+    assert list(map(lambda p: p.is_input, uio_pins)) == [False] + [True]*6 + [False]
+    
+    pins.safe_bidir()
+    assert desktop._uio_oe_pico == 0
+    assert all(map(lambda p: p.is_input, uio_pins))
+    
+    # so mode switches know what really needs changing
+    pins.set_bidir(0xff)
+    pins.mode = RPMode.SAFE
+    assert pins.mode_switch_pins_changed == 10
+    assert all(map(lambda p: p.is_input, uio_pins))
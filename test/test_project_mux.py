@@ -0,0 +1,99 @@
+import pytest
+from ttboard.mode import RPMode
+from ttboard.pins.pins import Pins
+from ttboard.project_mux import ProjectMux
+from ttboard.project_design import Design, DangerLevel
+
+@pytest.fixture
+def mux():
+    return ProjectMux(Pins(RPMode.ASIC_RP_CONTROL), 'tt06')
+
+def safe_design(mux, address:int):
+    des = Design(mux, f'tt_um_test_{address}', address)
+    des.danger_level = DangerLevel.SAFE
+    return des
+
+def test_enable_sends_pulse_burst(mux):
+    assert mux.enable(safe_design(mux, 900))
+    assert mux._pulse_train.bursts == [900]
+    assert mux.p.cena() == 1
+    
+    mux.mux_edge_us = 2
+    assert mux.enable(safe_design(mux, 3))
+    assert mux._pulse_train.edge_us == 2
+    assert mux.enabled.count == 3
+    
+def test_enable_zero_sends_nothing(mux):
+    assert mux.enable(safe_design(mux, 0))
+    assert mux._pulse_train.pulses_sent == 0
+    
+def test_pulse_train_reused(mux):
+    assert mux.enable(safe_design(mux, 12))
+    train = mux._pulse_train
+    assert mux.enable(safe_design(mux, 2))
+    assert mux.enable(safe_design(mux, 40))
+    assert mux._pulse_train is train
+    assert train.pin is mux.p.pin_cinc
+    assert train.bursts == [12, 2, 38]
+    
+def test_forward_selection_is_incremental(mux, monkeypatch):
+    resets = []
+    orig_reset = mux.reset
+    def counting_reset():
+        resets.append(mux.mux_position)
+        orig_reset()
+    monkeypatch.setattr(mux, 'reset', counting_reset)
+    
+    for address in [5, 10, 12, 12, 3, 4]:
+        assert mux.enable(safe_design(mux, address))
+        assert mux.mux_position == address
+    
+    # reset only at the start (position unknown) and to go back down to 3
+    assert resets == [None, 12]
+    assert mux._pulse_train.bursts == [5, 5, 2, 3, 1]
+    
+    mux.forget_mux_position()
+    assert mux.enable(safe_design(mux, 6))
+    assert len(resets) == 3
+    assert mux._pulse_train.bursts[-1] == 6
+    
+    mux.incremental_select = False
+    assert mux.enable(safe_design(mux, 7))
+    assert len(resets) == 4
+    assert mux._pulse_train.bursts[-1] == 7
+    
+def test_sweep(mux):
+    enabled_with_config = []
+    mux.design_enabled_callback = lambda d: enabled_with_config.append(d.count)
+    prepared = []
+    mux.sweep_start_callback = lambda designs: prepared.extend(map(lambda d: d.count, designs))
+    
+    risky = safe_design(mux, 20)
+    risky.danger_level = DangerLevel.MEDIUM
+    designs = [safe_design(mux, 30), risky, safe_design(mux, 2), safe_design(mux, 11)]
+    
+    def check(des):
+        if des.count == 11:
+            raise ValueError('nope')
+        return mux.mux_position
+    
+    results = mux.sweep(designs, check)
+    assert list(map(lambda r: r.design.count, results)) == [2, 11, 20, 30]
+    assert results[0].ok and results[0].result == 2
+    assert isinstance(results[1].error, ValueError)
+    assert results[2].skipped
+    assert results[3].ok and results[3].result == 30
+    
+    assert prepared == [2, 11, 30]
+    assert enabled_with_config == [2, 11, 30]
+    # a single climb up the addresses
+    assert mux._pulse_train.bursts == [2, 9, 19]
+    
+    results = mux.sweep(designs, check, max_allowable_danger=DangerLevel.MEDIUM, 
+                        apply_config=False)
+    assert results[2].ok and results[2].result == 20
+    assert enabled_with_config == [2, 11, 30]
+    assert mux.design_enabled_callback is not None
+    
+    with pytest.raises(ValueError):
+        mux.sweep(designs, check, stop_on_error=True)
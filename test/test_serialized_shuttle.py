@@ -89,3 +89,258 @@ def test_check_serialization(shuttle, shuttlepath):
                 check_design(jsonIndex.get(project_name), project)
             
 
+            
+
+def test_indexed_lookups(shuttle, shuttlepath, tmp_path):
+    
+    shuttle_json_file = os.path.join(shuttlepath, f'{shuttle}.json')
+    jsonIndex = DesignIndex(None, None)
+    jsonIndex.load_available(shuttle_json_file, force_json=True)
+    
+    v1_file = str(tmp_path / 'v1.bin')
+    v2_file = str(tmp_path / 'v2.bin')
+    v3_file = str(tmp_path / 'v3.bin')
+    jsonIndex.to_bin_file(v1_file, version=1)
+    jsonIndex.to_bin_file(v2_file, version=2)
+    jsonIndex.to_bin_file(v3_file, version=3)
+    
+    lookupIndex = DesignIndex(None, None)
+    
+    with open(v1_file, 'rb') as fh:
+        assert lookupIndex.bin_header_valid(fh) == 1
+    with open(v2_file, 'rb') as fh:
+        assert lookupIndex.bin_header_valid(fh) == 2
+    
+    for des in jsonIndex.all:
+        v1_des = lookupIndex.deserialize_design_by_address(v1_file, des.project_index)
+        v2_des = lookupIndex.deserialize_design_by_address(v2_file, des.project_index)
+        assert v1_des is not None and v2_des is not None
+        assert v2_des.name == v1_des.name
+        assert v2_des.clock_hz == v1_des.clock_hz
+        assert v2_des.danger_level == v1_des.danger_level
+        
+        v3_des = lookupIndex.deserialize_design_by_address(v3_file, des.project_index)
+        assert v3_des.name == v1_des.name
+        
+        by_name = lookupIndex.deserialize_design_by_name(v2_file, v1_des.name)
+        assert by_name is not None
+        assert by_name.name == v1_des.name
+        assert lookupIndex.deserialize_design_by_name(v3_file, v1_des.name).name == v1_des.name
+        
+    assert lookupIndex.deserialize_design_by_address(v2_file, 0xffff) is None
+    assert lookupIndex.deserialize_design_by_name(v2_file, 'not_a_project_name') is None
+    assert lookupIndex.deserialize_design_by_address(v3_file, 0xffff) is None
+    
+    # both versions load as complete indices
+    v1Index = DesignIndex(None, None)
+    v1Index.load_serialized(v1_file)
+    v2Index = DesignIndex(None, None)
+    v2Index.load_serialized(v2_file)
+    assert len(v1Index) == len(v2Index)
+    assert len(v2Index.find('_')) == len(v1Index.find('_'))
+    
+
+def test_indexed_find(shuttle, shuttlepath, tmp_path):
+    
+    shuttle_json_file = os.path.join(shuttlepath, f'{shuttle}.json')
+    jsonIndex = DesignIndex(None, None)
+    jsonIndex.load_available(shuttle_json_file, force_json=True)
+    
+    v1_file = str(tmp_path / 'v1.bin')
+    v3_file = str(tmp_path / 'v3.bin')
+    jsonIndex.to_bin_file(v1_file, version=1)
+    jsonIndex.to_bin_file(v3_file, version=3)
+    
+    searches = ['_', 'tt', 'tt_um', 'not_a_project_name']
+    for des in jsonIndex.all[::7]:
+        # whole names, and bits of them
+        searches.append(des.name)
+        searches.append(des.name[2:7])
+        searches.append(des.name[-4:])
+    
+    for search in searches:
+        scanned = DesignIndex(None, None).deserialize_find_names(v1_file, search)
+        indexed = DesignIndex(None, None).deserialize_find_names(v3_file, search)
+        assert list(map(lambda d: d.name, indexed)) == list(map(lambda d: d.name, scanned))
+        assert list(map(lambda d: d.project_index, indexed)) == list(map(lambda d: d.project_index, scanned))
+        assert len(scanned) == len(jsonIndex.find(search))
+    
+    
+def test_compiled_json(shuttle, shuttlepath, tmp_path):
+    
+    shuttle_json_file = os.path.join(shuttlepath, f'{shuttle}.json')
+    jsonIndex = DesignIndex(None, None)
+    jsonIndex.load_available(shuttle_json_file, force_json=True)
+    
+    for version in [1, 2, 3]:
+        loaded_file = str(tmp_path / f'loaded.v{version}.bin')
+        compiled_file = str(tmp_path / f'compiled.v{version}.bin')
+        jsonIndex.to_bin_file(loaded_file, version=version)
+        DesignIndex.compile_json_to_bin_file(shuttle_json_file, compiled_file, version)
+        
+        with open(loaded_file, 'rb') as fh:
+            loaded = fh.read()
+        with open(compiled_file, 'rb') as fh:
+            compiled = fh.read()
+        assert compiled == loaded
+    
+    
+def test_name_hash(shuttle, shuttlepath, tmp_path):
+    
+    shuttle_json_file = os.path.join(shuttlepath, f'{shuttle}.json')
+    jsonIndex = DesignIndex(None, None)
+    jsonIndex.load_available(shuttle_json_file, force_json=True)
+    
+    v3_file = str(tmp_path / 'v3.bin')
+    jsonIndex.to_bin_file(v3_file, version=3)
+    
+    strictIndex = DesignIndex(None, None, strict_memory_saving=True)
+    strictIndex.load_serialized(v3_file)
+    assert len(strictIndex.all) == 0
+    
+    for des in jsonIndex.all:
+        assert strictIndex.name_may_exist(des.name)
+        assert strictIndex.is_available(des.name)
+        loaded = strictIndex.load_project(des.name)
+        assert loaded.project_index == des.project_index
+        assert loaded.clock_hz == des.clock_hz
+    
+    unknowns = list(map(lambda i: f'tt_um_not_a_project_{i}', range(200)))
+    for name in unknowns:
+        assert not jsonIndex.is_available(name)
+        
+    # answered from the fingerprints in RAM, the file isn't needed
+    strictIndex._src_serialized_bin = str(tmp_path / 'gone.bin')
+    ruled_out = list(filter(lambda n: not strictIndex.name_may_exist(n), unknowns))
+    assert len(ruled_out) > 0.9*len(unknowns)
+    for name in ruled_out:
+        assert not strictIndex.is_available(name)
+    
+def test_truncated_bin(shuttle, shuttlepath, tmp_path):
+    
+    shuttle_json_file = os.path.join(shuttlepath, f'{shuttle}.json')
+    jsonIndex = DesignIndex(None, None)
+    jsonIndex.load_available(shuttle_json_file, force_json=True)
+    
+    for version in [1, 3]:
+        full_file = str(tmp_path / f'full.v{version}.bin')
+        jsonIndex.to_bin_file(full_file, version=version)
+        with open(full_file, 'rb') as fh:
+            contents = fh.read()
+        fullIndex = DesignIndex(None, None)
+        fullIndex.load_serialized(full_file)
+        num_projects = len(fullIndex)
+        
+        # chopped off mid-record: keeps what came before
+        cut_file = str(tmp_path / f'cut.v{version}.bin')
+        with open(cut_file, 'wb') as fh:
+            fh.write(contents[:-7])
+        cutIndex = DesignIndex(None, None)
+        cutIndex.load_serialized(cut_file)
+        assert len(cutIndex) == num_projects - 1
+        first = fullIndex.all[0]
+        assert cutIndex.get(first.name).project_index == first.project_index
+        
+        # a last record whose name runs past its end
+        last = fullIndex.all[-1]
+        payload_len = 1 + len(last.name) + 5 # name len, name, danger, clock
+        assert contents[-payload_len] == len(last.name)
+        bad_file = str(tmp_path / f'bad.v{version}.bin')
+        corrupted = bytearray(contents)
+        corrupted[-payload_len] = 0xff
+        with open(bad_file, 'wb') as fh:
+            fh.write(corrupted)
+        badIndex = DesignIndex(None, None)
+        badIndex.load_serialized(bad_file)
+        assert len(badIndex) == num_projects - 1
+    
+@pytest.mark.parametrize('chunk_bytes', [260, 301, 4096])
+def test_chunked_load(shuttle, shuttlepath, tmp_path, monkeypatch, chunk_bytes):
+    
+    shuttle_json_file = os.path.join(shuttlepath, f'{shuttle}.json')
+    jsonIndex = DesignIndex(None, None)
+    jsonIndex.load_available(shuttle_json_file, force_json=True)
+    expected = list(map(lambda d: (d.project_index, d.name, d.clock_hz), jsonIndex.all))
+    monkeypatch.setattr(DesignIndex, 'DeserializeChunkBytes', chunk_bytes)
+    
+    for version in [1, 2, 3]:
+        bin_file = str(tmp_path / f'shuttle.v{version}.bin')
+        jsonIndex.to_bin_file(bin_file, version=version)
+        binIndex = DesignIndex(None, None)
+        binIndex.load_serialized(bin_file)
+        assert list(map(lambda d: (d.project_index, d.name, d.clock_hz), binIndex.all)) == expected
+        
+        # strict mode only needs the count
+        strictIndex = DesignIndex(None, None, strict_memory_saving=True)
+        strictIndex.load_serialized(bin_file)
+        assert len(strictIndex) == len(expected)
+        assert len(strictIndex._table) == 0
+    
+def test_duplicate_names(shuttle, shuttlepath, tmp_path):
+    
+    shuttle_json_file = os.path.join(shuttlepath, f'{shuttle}.json')
+    with open(shuttle_json_file) as fh:
+        projects = json.load(fh)['projects'][:20]
+    addresses = list(map(lambda p: int(p['address']), projects))
+    free_address = max(addresses) + 1
+    renamed = dict(projects[3])
+    renamed['address'] = str(free_address)
+    # same name again, later in the file and at a new address: replaces the first
+    projects.append(renamed)
+    # same address, different name: first one stays
+    clash = dict(projects[5])
+    clash['macro'] = 'tt_um_address_clash'
+    projects.append(clash)
+    
+    dup_json_file = str(tmp_path / 'dups.json')
+    with open(dup_json_file, 'w') as fh:
+        json.dump({'projects': projects}, fh)
+    
+    jsonIndex = DesignIndex(None, None)
+    jsonIndex.load_available(dup_json_file, force_json=True)
+    dup_name = jsonIndex.clean_project_name(renamed)
+    assert jsonIndex.project_index(dup_name) == free_address
+    
+    for version in [1, 2, 3]:
+        bin_file = str(tmp_path / f'dups.v{version}.bin')
+        DesignIndex.compile_json_to_bin_file(dup_json_file, bin_file, version)
+        with open(bin_file, 'rb') as fh:
+            compiled = fh.read()
+        assert compiled == DesignIndex.bin_header(version) + jsonIndex.serialize(version)
+        
+        binIndex = DesignIndex(None, None)
+        binIndex.load_serialized(bin_file)
+        assert binIndex.count == 20
+        assert binIndex.project_index(dup_name) == free_address
+        assert binIndex.project_name(addresses[3]) is None
+        assert binIndex.project_name(addresses[5]) == jsonIndex.clean_project_name(projects[5])
+        assert len(binIndex.find('tt_um_address_clash')) == 0
+    
+def test_find_order(shuttle, shuttlepath, tmp_path):
+    
+    shuttle_json_file = os.path.join(shuttlepath, f'{shuttle}.json')
+    with open(shuttle_json_file) as fh:
+        projects = json.load(fh)['projects']
+    # file order no longer address order
+    projects.reverse()
+    reversed_json_file = str(tmp_path / 'reversed.json')
+    with open(reversed_json_file, 'w') as fh:
+        json.dump({'projects': projects}, fh)
+    
+    jsonIndex = DesignIndex(None, None)
+    jsonIndex.load_available(reversed_json_file, force_json=True)
+    indices = [jsonIndex]
+    for version in [1, 3]:
+        bin_file = str(tmp_path / f'reversed.v{version}.bin')
+        jsonIndex.to_bin_file(bin_file, version=version)
+        binIndex = DesignIndex(None, None)
+        binIndex.load_serialized(bin_file)
+        strictIndex = DesignIndex(None, None, strict_memory_saving=True)
+        strictIndex.load_serialized(bin_file)
+        indices += [binIndex, strictIndex]
+    
+    for search in ['', '_', 'tt_um', projects[0]['macro'][:6]]:
+        expected = sorted(map(lambda d: d.project_index, jsonIndex.find(search)))
+        assert len(expected) > 1
+        for index in indices:
+            assert list(map(lambda d: d.project_index, index.find(search))) == expected